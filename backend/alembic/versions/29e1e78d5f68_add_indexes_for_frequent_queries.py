@@ -0,0 +1,49 @@
+"""Add indexes for frequent queries
+
+Indexes the foreign keys the tasks, pipeline steps and pipeline executions are
+looked up and joined by, the task status used by the stats and the update date
+the task listing is ordered by. The partial index only contains the tasks that
+are still in progress, it stays small however long the history of tasks is.
+
+Revision ID: 29e1e78d5f68
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 09:12:45.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29e1e78d5f68'
+down_revision = 'b2c3d4e5f6a7'
+branch_labels = None
+depends_on = None
+
+# Statuses of the tasks that are not finished, as stored in the database
+IN_PROGRESS_CONDITION = "status IN ('PENDING', 'SCHEDULED', 'FETCHING', 'PROCESSING', 'SAVING')"
+
+
+def upgrade():
+    op.create_index(op.f('ix_tasks_pipeline_execution_id'), 'tasks', ['pipeline_execution_id'], unique=False)
+    op.create_index(op.f('ix_tasks_service_id'), 'tasks', ['service_id'], unique=False)
+    op.create_index(op.f('ix_tasks_status'), 'tasks', ['status'], unique=False)
+    op.create_index(op.f('ix_tasks_updated_at'), 'tasks', ['updated_at'], unique=False)
+    op.create_index('ix_tasks_in_progress', 'tasks', ['service_id', 'status'], unique=False,
+                    postgresql_where=sa.text(IN_PROGRESS_CONDITION),
+                    sqlite_where=sa.text(IN_PROGRESS_CONDITION))
+    op.create_index(op.f('ix_pipeline_steps_pipeline_id'), 'pipeline_steps', ['pipeline_id'], unique=False)
+    op.create_index(op.f('ix_pipeline_steps_service_id'), 'pipeline_steps', ['service_id'], unique=False)
+    op.create_index(op.f('ix_pipeline_executions_pipeline_id'), 'pipeline_executions', ['pipeline_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pipeline_executions_pipeline_id'), table_name='pipeline_executions')
+    op.drop_index(op.f('ix_pipeline_steps_service_id'), table_name='pipeline_steps')
+    op.drop_index(op.f('ix_pipeline_steps_pipeline_id'), table_name='pipeline_steps')
+    op.drop_index('ix_tasks_in_progress', table_name='tasks')
+    op.drop_index(op.f('ix_tasks_updated_at'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_status'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_service_id'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_pipeline_execution_id'), table_name='tasks')
@@ -62,3 +62,36 @@ class ConstraintException(Exception):
     def __init__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class NotModifiedException(Exception):
+    """Exception raised when a resource has not been modified since the version known by the client."""
+
+    def __init__(self, message, etag=None):
+        self.message = message
+        self.etag = etag
+        super().__init__(self.message)
+
+
+class RangeNotSatisfiableException(Exception):
+    """Exception raised when the requested range of a resource cannot be served."""
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidConditionException(Exception):
+    """Exception raised when a pipeline step condition is not a valid expression."""
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidCursorException(Exception):
+    """Exception raised when a pagination cursor is malformed or does not match the requested order."""
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
@@ -1,3 +1,6 @@
+import mimetypes
+
+
 def get_example_filename(field):
     """
     Helper to generate example filename based on field type.
@@ -24,3 +27,20 @@ def get_example_filename(field):
     }
 
     return examples.get(content_type, "input.file")
+
+
+def get_file_extension(field):
+    """
+    Helper to get the file extension of a field from its first accepted content type.
+    """
+    field_types = field.get("type") if isinstance(field, dict) else getattr(field, "type", [])
+    if isinstance(field_types, (list, tuple)) and len(field_types) > 0:
+        content_type = field_types[0]
+    elif isinstance(field_types, str):
+        content_type = field_types
+    else:
+        return ""
+
+    content_type = content_type.value if hasattr(content_type, "value") else str(content_type)
+
+    return mimetypes.guess_extension(content_type) or ""
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+from typing import List, Tuple
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import tuple_
+from sqlmodel import Session, select, func
+from common.exceptions import InvalidCursorException
+
+
+def count_rows(session: Session, statement) -> int:
+    """
+    Count the rows matching a statement in the database
+    :param session: The database session
+    :param statement: The statement to count the rows of
+    :return: The number of rows
+    """
+    return session.exec(select(func.count()).select_from(statement.order_by(None).subquery())).one()
+
+
+def find_page_with_total_count(session: Session, statement, skip: int, limit: int) -> Tuple[int, List]:
+    """
+    Find a page of the rows matching a statement with the total number of rows
+    :param session: The database session
+    :param statement: The statement to find the rows of
+    :param skip: The number of rows to skip
+    :param limit: The maximum number of rows to return
+    :return: The total number of rows and the rows of the page
+    """
+    rows = session.exec(statement.offset(skip).limit(limit)).all()
+
+    # A page that is not full is the last one, the rows do not need to be counted
+    if 0 < len(rows) < limit or (skip == 0 and len(rows) == 0):
+        return skip + len(rows), rows
+
+    return count_rows(session, statement), rows
+
+
+def encode_cursor(order_by: str, order: str, value, row_id) -> str:
+    """
+    Encode the position of a row in an ordered listing
+    :param order_by: The field the listing is ordered by
+    :param order: The order of the listing (asc or desc)
+    :param value: The value of the field of the row
+    :param row_id: The id of the row
+    :return: The opaque cursor
+    """
+    cursor = json.dumps(jsonable_encoder([order_by, order, value, row_id]), separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(cursor.encode()).decode().rstrip("=")
+
+
+def decode_cursor(after: str) -> Tuple[str, str, object, object]:
+    """
+    Decode the position of a row in an ordered listing
+    :param after: The opaque cursor
+    :return: The field and the order of the listing, the value of the field and the id of the row
+    """
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(after + "=" * (-len(after) % 4)))
+        order_by, order, value, row_id = cursor
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorException("The cursor is not valid")
+
+    return order_by, order, value, row_id
+
+
+def find_page_after(
+        session: Session,
+        statement,
+        model,
+        after: str | None,
+        limit: int,
+        order_by: str | None,
+        order: str | None,
+        default_order_by: str,
+        default_order: str,
+) -> Tuple[List, str | None]:
+    """
+    Find the page of the rows matching a statement that follows a cursor, ordered by a field and the id of the rows.
+    The rows are found from their position in the index instead of being skipped with an offset.
+    The rows without a value for the field come last, whatever the order.
+    :param session: The database session
+    :param statement: The statement to find the rows of, without order
+    :param model: The model of the rows
+    :param after: The cursor of the last row of the previous page, None for the first page
+    :param limit: The maximum number of rows to return
+    :param order_by: The field to order by, None for the field of the cursor or the default one
+    :param order: The order (asc or desc), None for the order of the cursor or the default one
+    :param default_order_by: The field to order the first page by when none is given
+    :param default_order: The order of the first page when none is given
+    :return: The rows of the page and the cursor of the next page, None if it is the last page
+    """
+    value = row_id = None
+
+    if after:
+        cursor_order_by, cursor_order, value, row_id = decode_cursor(after)
+        if order_by not in (None, cursor_order_by) or order not in (None, cursor_order):
+            raise InvalidCursorException("The cursor does not match the order of the request")
+        order_by, order = cursor_order_by, cursor_order
+    else:
+        order_by, order = order_by or default_order_by, order or default_order
+
+    column = model.__table__.columns.get(order_by)
+    id_column = model.__table__.columns.id
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        python_type = None
+    if python_type in (None, dict, list):
+        raise InvalidCursorException(f"Cannot paginate with a cursor ordered by {order_by}")
+
+    if after:
+        try:
+            value = None if value is None else TypeAdapter(python_type).validate_python(value)
+            row_id = TypeAdapter(id_column.type.python_type).validate_python(row_id)
+        except ValidationError:
+            raise InvalidCursorException("The cursor is not valid")
+
+    descending = order == "desc"
+    statement = statement.order_by(None)
+    rows = []
+
+    # The rows with a value for the field, unless the previous page already reached the rows without one
+    if not after or value is not None:
+        page_statement = statement
+        if column.nullable:
+            page_statement = page_statement.where(column.is_not(None))
+        if after:
+            key = tuple_(column, id_column)
+            page_statement = page_statement.where(
+                key < tuple_(value, row_id) if descending else key > tuple_(value, row_id)
+            )
+        page_statement = page_statement.order_by(
+            *([column.desc(), id_column.desc()] if descending else [column.asc(), id_column.asc()])
+        )
+        rows = list(session.exec(page_statement.limit(limit)).all())
+
+    # The rows without a value for the field, ordered by id
+    if len(rows) < limit and column.nullable:
+        page_statement = statement.where(column.is_(None))
+        if after and value is None:
+            page_statement = page_statement.where(id_column < row_id if descending else id_column > row_id)
+        page_statement = page_statement.order_by(id_column.desc() if descending else id_column.asc())
+        rows += session.exec(page_statement.limit(limit - len(rows))).all()
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        last_row = rows[-1]
+        next_cursor = encode_cursor(order_by, order, getattr(last_row, column.key), last_row.id)
+
+    return rows, next_cursor
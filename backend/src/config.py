@@ -30,7 +30,25 @@ class Settings(BaseSettings):
     s3_region: str = "eu-central-2"
     s3_host: str
     s3_bucket: str
+    s3_max_pool_connections: int = 50
+    s3_keepalive_timeout: int = 60
+    s3_multipart_part_size: int = 8 * 1024 * 1024
+    s3_multipart_concurrency: int = 4
+    s3_presigned_urls: bool = False
+    s3_presigned_url_expiration: int = 3600
+    file_cache_max_size: int = 64 * 1024 * 1024
+    file_cache_max_file_size: int = 1024 * 1024
     check_services_availability_interval: int = 30
+    check_services_availability_concurrency: int = 10
+    check_services_availability_timeout: float = 5.0
+    heartbeat_flush_interval: int = 2
+    openapi_schema_generation_delay: float = 0.5
+    message_queue_max_size: int = 10000
+    message_queue_max_size_per_linked_id: int = 100
+    message_queue_ttl: int = 300
+    message_queue_max_attempts: int = 5
+    message_queue_retry_backoff: float = 1.0
+    message_queue_retry_interval: int = 5
     sentry_dsn: str
 
 
@@ -1,10 +1,14 @@
 import json
-from typing import List
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List
 from fastapi import WebSocket
 from functools import lru_cache
 from uuid import UUID
 from connection_manager.models import Connection, ExecutionType, MessageSubject, MessageType, Message, MessageToSend, \
-    ConnectionData
+    ConnectionData, MessageQueueStats
+from config import get_settings
 from common.exceptions import CouldNotSendJsonException
 
 
@@ -12,43 +16,174 @@ async def send_json_to_websocket(message: Message, websocket: WebSocket):
     await websocket.send_json(message.model_dump())
 
 
+@dataclass
+class QueuedMessage:
+    message_to_send: MessageToSend
+    expires_at: float
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+
+
 class MessageQueue:
-    def __init__(self):
-        self.queue: List[MessageToSend] = []
+    """
+    Messages that could not be sent, grouped by linked_id and kept until they are delivered, expire or have been
+    retried too many times
+    """
+
+    def __init__(
+            self,
+            max_size: int = 10000,
+            max_size_per_linked_id: int = 100,
+            ttl: float = 300,
+            max_attempts: int = 5,
+            retry_backoff: float = 1.0,
+    ):
+        self.max_size = max(max_size, 1)
+        self.max_size_per_linked_id = max(max_size_per_linked_id, 1)
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        # The linked_ids are kept in the order their first pending message was queued
+        self.queues: Dict[str, Deque[QueuedMessage]] = {}
+        self.size = 0
+        self.delivered = 0
+        self.dropped_full = 0
+        self.dropped_expired = 0
+        self.dropped_attempts = 0
 
     def add(self, message: MessageToSend):
-        self.queue.append(message)
+        key = str(message.linked_id)
+        queue = self.queues.get(key)
+
+        # Drop the oldest message of the linked_id, or of the linked_id queued first when the queue is full
+        if queue is not None and len(queue) >= self.max_size_per_linked_id:
+            self.drop_oldest(key)
+            self.dropped_full += 1
+        elif self.size >= self.max_size:
+            self.drop_oldest(next(iter(self.queues)))
+            self.dropped_full += 1
+
+        self.queues.setdefault(key, deque()).append(
+            QueuedMessage(message_to_send=message, expires_at=time.monotonic() + self.ttl)
+        )
+        self.size += 1
+
+    def drop_oldest(self, key: str):
+        queue = self.queues[key]
+        queue.popleft()
+        self.size -= 1
+        if not queue:
+            del self.queues[key]
+
+    def take_due(self, linked_id: UUID, now: float) -> List[QueuedMessage]:
+        """
+        Remove the messages of a linked_id that can be sent now, in the order they were queued
+        :param linked_id: The linked_id
+        :param now: The current monotonic time
+        :return: The messages to send
+        """
+        key = str(linked_id)
+        queue = self.queues.get(key)
+        due_messages = []
+
+        while queue and queue[0].next_attempt_at <= now:
+            queued_message = queue.popleft()
+            self.size -= 1
+            if queued_message.expires_at <= now:
+                self.dropped_expired += 1
+            else:
+                due_messages.append(queued_message)
+
+        if queue is not None and not queue:
+            del self.queues[key]
+
+        return due_messages
+
+    def retry(self, queued_messages: List[QueuedMessage], now: float):
+        """
+        Put back messages that could not be sent at the front of their queue, the first one being the failed one
+        :param queued_messages: The messages in the order they were queued
+        :param now: The current monotonic time
+        """
+        failed_message = queued_messages[0]
+        failed_message.attempts += 1
+        if failed_message.attempts >= self.max_attempts:
+            self.dropped_attempts += 1
+            queued_messages = queued_messages[1:]
+        if not queued_messages:
+            return
 
-    def get(self):
-        return self.queue.pop(0)
+        next_attempt_at = now + self.retry_backoff * 2 ** (failed_message.attempts - 1)
+        key = str(queued_messages[0].message_to_send.linked_id)
+        queue = self.queues.setdefault(key, deque())
+        for queued_message in reversed(queued_messages):
+            queued_message.next_attempt_at = next_attempt_at
+            queue.appendleft(queued_message)
+        self.size += len(queued_messages)
+
+    def remove_expired(self, now: float):
+        for key in list(self.queues):
+            queue = self.queues[key]
+            while queue and queue[0].expires_at <= now:
+                queue.popleft()
+                self.size -= 1
+                self.dropped_expired += 1
+            if not queue:
+                del self.queues[key]
+
+    def stats(self):
+        return MessageQueueStats(
+            depth=self.size,
+            linked_ids=len(self.queues),
+            delivered=self.delivered,
+            dropped_full=self.dropped_full,
+            dropped_expired=self.dropped_expired,
+            dropped_attempts=self.dropped_attempts,
+        )
 
 
 class ConnectionManager:
     def __init__(
             self,
+            message_queue: MessageQueue | None = None,
     ):
-        self.active_connections: List[Connection] = []
-        self.message_queue = MessageQueue()
+        # Connections indexed by the id of their websocket and by linked_id (several websockets per linked_id)
+        self.active_connections: Dict[int, Connection] = {}
+        self.connections_by_linked_id: Dict[str, Dict[int, Connection]] = {}
+        self.message_queue = message_queue or MessageQueue()
+
+    def find_all_by_linked_id(self, linked_id: UUID) -> List[Connection]:
+        return list(self.connections_by_linked_id.get(str(linked_id), {}).values())
 
     def find_by_linked_id(self, linked_id: UUID):
-        for connection in self.active_connections:
-            if str(connection.linked_id) == str(linked_id):
-                return connection
+        connections = self.connections_by_linked_id.get(str(linked_id))
+        if connections:
+            return next(iter(connections.values()))
         return None
 
     def find_by_websocket(self, websocket: WebSocket):
-        for connection in self.active_connections:
-            if connection.websocket == websocket:
-                return connection
-        return None
+        return self.active_connections.get(id(websocket))
 
     def set_linked_id(self, websocket: WebSocket, linked_id: UUID):
         connection = self.find_by_websocket(websocket)
         if connection:
+            self.unlink(connection)
             connection.linked_id = linked_id
+            if linked_id is not None:
+                self.connections_by_linked_id.setdefault(str(linked_id), {})[id(websocket)] = connection
             return connection
         return None
 
+    def unlink(self, connection: Connection):
+        if connection.linked_id is None:
+            return
+        key = str(connection.linked_id)
+        connections = self.connections_by_linked_id.get(key)
+        if connections is not None:
+            connections.pop(id(connection.websocket), None)
+            if not connections:
+                del self.connections_by_linked_id[key]
+
     def set_execution_type(self, websocket: WebSocket, execution_type: ExecutionType):
         connection = self.find_by_websocket(websocket)
         if connection:
@@ -60,7 +195,7 @@ class ConnectionManager:
         await websocket.accept()
         connection = Connection()
         connection.websocket = websocket
-        self.active_connections.append(connection)
+        self.active_connections[id(websocket)] = connection
         connection_data = ConnectionData(linked_id=connection.linked_id, execution_type=connection.execution_type)
         message = Message(
             message={
@@ -72,43 +207,71 @@ class ConnectionManager:
         await send_json_to_websocket(message, connection.websocket)
 
     def disconnect(self, websocket: WebSocket):
-        connection = self.find_by_websocket(websocket)
+        connection = self.active_connections.pop(id(websocket), None)
         if connection:
-            self.active_connections.remove(connection)
+            self.unlink(connection)
             connection.websocket.close()
 
     async def send_string(self, message: str, linked_id: UUID):
-        connection = self.find_by_linked_id(linked_id)
-        if connection:
+        for connection in self.find_all_by_linked_id(linked_id):
             await connection.websocket.send_text(message)
 
     async def send_json(self, message: Message, linked_id: UUID):
-        connection = self.find_by_linked_id(linked_id)
+        connections = self.find_all_by_linked_id(linked_id)
         # Need to dump and load to avoid serialization issues
         json_dumped = json.dumps(message.model_dump(), default=str)
         json_object = json.loads(json_dumped)
-        if connection:
-            await connection.websocket.send_json(json_object)
+        if connections:
+            for connection in connections:
+                await connection.websocket.send_json(json_object)
         else:
             raise CouldNotSendJsonException(f"Could not send json to linked_id {linked_id}", message, linked_id)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
+        for connection in list(self.active_connections.values()):
             await connection.websocket.send_text(message)
 
     async def broadcast_json(self, message: Message):
-        for connection in self.active_connections:
+        for connection in list(self.active_connections.values()):
             await connection.websocket.send_json(message.model_dump())
 
-    async def retry_send_message(self):
-        while len(self.message_queue.queue) > 0:
-            message_to_send = self.message_queue.get()
+    async def send_queued_messages(self, linked_id: UUID):
+        """
+        Send the queued messages of a linked_id that are due, stopping at the first failure
+        :param linked_id: The linked_id
+        """
+        now = time.monotonic()
+        queued_messages = self.message_queue.take_due(linked_id, now)
+
+        for index, queued_message in enumerate(queued_messages):
             try:
-                await self.send_json(message_to_send.message, message_to_send.linked_id)
-            except CouldNotSendJsonException:
-                pass
+                await self.send_json(queued_message.message_to_send.message, linked_id)
+                self.message_queue.delivered += 1
+            except Exception:
+                self.message_queue.retry(queued_messages[index:], now)
+                break
+
+    async def retry_send_message(self):
+        """
+        Drop the expired messages and retry the messages of the linked clients
+        """
+        self.message_queue.remove_expired(time.monotonic())
+
+        for linked_id in list(self.message_queue.queues):
+            if linked_id in self.connections_by_linked_id:
+                await self.send_queued_messages(linked_id)
 
 
 @lru_cache()
 def get_connection_manager():
-    return ConnectionManager()
+    settings = get_settings()
+
+    return ConnectionManager(
+        message_queue=MessageQueue(
+            max_size=settings.message_queue_max_size,
+            max_size_per_linked_id=settings.message_queue_max_size_per_linked_id,
+            ttl=settings.message_queue_ttl,
+            max_attempts=settings.message_queue_max_attempts,
+            retry_backoff=settings.message_queue_retry_backoff,
+        ),
+    )
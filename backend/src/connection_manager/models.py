@@ -79,3 +79,15 @@ class MessageToSend(BaseModel):
 
     message: Message
     linked_id: UUID
+
+
+class MessageQueueStats(BaseModel):
+    """
+    MessageQueueStats is used to expose the state of the queue of the messages that could not be sent.
+    """
+    depth: int
+    linked_ids: int
+    delivered: int
+    dropped_full: int
+    dropped_expired: int
+    dropped_attempts: int
@@ -19,6 +19,7 @@ from storage.service import StorageService
 from config import get_settings
 from timer import Timer
 from http_client import HttpClient
+from route_registry import RouteRegistry, get_route_registry
 from sentry_sdk import init as sentry_init
 from contextlib import asynccontextmanager
 
@@ -90,6 +91,9 @@ async def lifespan(api: FastAPI):
         http_client=http_client,
     )
 
+    # Open the storage client shared by the process
+    await storage_service.open_client()
+
     # Check storage
     await storage_service.check_storage_availability()
 
@@ -99,6 +103,9 @@ async def lifespan(api: FastAPI):
     # Enable pipelines
     pipelines_service.enable_pipelines(app)
 
+    # Generate the OpenAPI schema of the registered services and pipelines
+    get_route_registry(app).schedule_schema_generation()
+
     # Check for services that are not running
     check_services_timer = Timer(
         timeout=settings.check_services_availability_interval,
@@ -108,14 +115,23 @@ async def lifespan(api: FastAPI):
 
     check_services_timer.start()
 
+    # Write the heartbeats of the services to the database in bulk
+    flush_heartbeats_timer = Timer(
+        timeout=settings.heartbeat_flush_interval,
+        callback=services_service.flush_heartbeats,
+    )
+
+    flush_heartbeats_timer.start()
+
     retry_send_message_timer = Timer(
-        timeout=5,
+        timeout=settings.message_queue_retry_interval,
         callback=connection_manager.retry_send_message,
     )
 
     retry_send_message_timer.start()
 
     timers.append(check_services_timer)
+    timers.append(flush_heartbeats_timer)
     timers.append(retry_send_message_timer)
 
     yield
@@ -124,6 +140,10 @@ async def lifespan(api: FastAPI):
     for timer in timers:
         timer.stop()
 
+    await services_service.flush_heartbeats()
+
+    await storage_service.close_client()
+
 
 # Define the FastAPI application with information
 app = FastAPI(
@@ -146,6 +166,9 @@ app = FastAPI(
     },
 )
 
+# Index the routes of the registered services and pipelines
+app.state.route_registry = RouteRegistry(app, schema_generation_delay=settings.openapi_schema_generation_delay)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -186,6 +209,9 @@ async def websocket_endpoint(websocket: WebSocket):
                 type=MessageType.SUCCESS, subject=MessageSubject.CONNECTION
             )
             await connection_manager.send_json(message, connection.linked_id)
+
+            # Deliver the messages sent while the client was not linked
+            await connection_manager.send_queued_messages(connection.linked_id)
     except WebSocketDisconnect:
         connection_manager.disconnect(websocket)
         await connection_manager.broadcast("Client disconnected")
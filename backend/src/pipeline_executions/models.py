@@ -22,7 +22,7 @@ class PipelineExecutionBase(CoreModel):
     """
     model_config = SettingsConfigDict(arbitrary_types_allowed=True)
 
-    pipeline_id: Optional[UUID] = Field(default=None, foreign_key="pipelines.id")
+    pipeline_id: Optional[UUID] = Field(default=None, foreign_key="pipelines.id", index=True)
     current_pipeline_step_id: Optional[UUID] = Field(default=None, foreign_key="pipeline_steps.id")
 
 
@@ -0,0 +1,158 @@
+import ast
+import re
+from uuid import UUID
+from common.exceptions import InvalidConditionException
+
+# Functions and methods that can be used in a condition
+ALLOWED_FUNCTIONS = {
+    "abs": abs,
+    "all": all,
+    "any": any,
+    "bool": bool,
+    "float": float,
+    "int": int,
+    "len": len,
+    "max": max,
+    "min": min,
+    "round": round,
+    "str": str,
+    "sum": sum,
+}
+ALLOWED_METHODS = {
+    "count", "endswith", "get", "items", "keys", "lower", "startswith", "strip", "upper", "values",
+}
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp, ast.Call, ast.Attribute, ast.Subscript, ast.Slice, ast.Name, ast.Load, ast.Store, ast.Constant,
+    ast.List, ast.Tuple, ast.Set, ast.Dict, ast.ListComp, ast.GeneratorExp, ast.comprehension,
+)
+
+# String literals are kept as is when the condition is rewritten
+STRING_LITERAL_PATTERN = re.compile(r"""('(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")""")
+
+_compiled_conditions: dict[UUID, "CompiledCondition"] = {}
+
+
+def get_alias(reference: str) -> str:
+    """
+    Get the Python name of a reference (`<identifier>.<variable>`)
+    :param reference: The reference
+    :return: The alias of the reference
+    """
+    return re.sub(r"[-.]", "_", reference)
+
+
+def rewrite_condition(condition: str, references: list[str]) -> tuple[str, dict[str, str]]:
+    """
+    Rewrite a condition as a Python expression: the references are replaced by their alias
+    and the `&&`, `||` and `!` operators by `and`, `or` and `not`
+    :param condition: The condition
+    :param references: The references that can be used in the condition
+    :return: The Python expression and the alias of each reference used in the condition
+    """
+    aliases = {}
+    parts = STRING_LITERAL_PATTERN.split(condition)
+
+    # Odd parts are the string literals
+    for index in range(0, len(parts), 2):
+        part = parts[index]
+        for reference in sorted(references, key=len, reverse=True):
+            pattern = rf"(?<![A-Za-z0-9_-]){re.escape(reference)}(?![A-Za-z0-9_-])"
+            if re.search(pattern, part):
+                aliases[reference] = get_alias(reference)
+                part = re.sub(pattern, aliases[reference], part)
+        part = part.replace("&&", " and ").replace("||", " or ")
+        part = re.sub(r"!(?!=)", " not ", part)
+        parts[index] = part
+
+    return "".join(parts), aliases
+
+
+class CompiledCondition:
+    """
+    Condition of a pipeline step parsed once and validated as a restricted expression
+    """
+
+    def __init__(self, condition: str, references: list[str]):
+        self.source = condition
+        self.references = list(references)
+
+        expression, self.aliases = rewrite_condition(condition, self.references)
+
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise InvalidConditionException(f"The condition '{condition}' is not a valid expression: {e.msg}")
+
+        validate_expression(tree, set(self.aliases.values()), condition)
+
+        self.code = compile(tree, "<condition>", "eval")
+
+    def evaluate(self, files: dict) -> bool:
+        """
+        Evaluate the condition
+        :param files: The decoded content of the files by reference
+        :return: The result of the condition
+        """
+        bindings = {alias: files[reference] for reference, alias in self.aliases.items() if reference in files}
+
+        return bool(eval(self.code, {"__builtins__": {}, **ALLOWED_FUNCTIONS}, bindings))
+
+
+def validate_expression(tree: ast.Expression, names: set[str], condition: str):
+    """
+    Check that an expression only uses the allowed operations, functions and names
+    :param tree: The parsed expression
+    :param names: The names bound when the condition is evaluated
+    :param condition: The source condition, used in the error messages
+    """
+    # Variables of the comprehensions
+    local_names = {
+        node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)
+    }
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise InvalidConditionException(
+                f"The condition '{condition}' uses a forbidden operation ({type(node).__name__})."
+            )
+        if isinstance(node, ast.Attribute) and node.attr not in ALLOWED_METHODS:
+            raise InvalidConditionException(f"The condition '{condition}' uses a forbidden attribute ({node.attr}).")
+        if isinstance(node, ast.Call):
+            is_function = isinstance(node.func, ast.Name) and node.func.id in ALLOWED_FUNCTIONS
+            is_method = isinstance(node.func, ast.Attribute)
+            if not is_function and not is_method:
+                raise InvalidConditionException(f"The condition '{condition}' calls a forbidden function.")
+        if isinstance(node, ast.Name) and node.id not in names | local_names | ALLOWED_FUNCTIONS.keys():
+            raise InvalidConditionException(f"The condition '{condition}' uses an unknown reference ({node.id}).")
+
+
+def get_compiled_condition(pipeline_step) -> CompiledCondition:
+    """
+    Get the compiled condition of a pipeline step, compiling it on first use
+    :param pipeline_step: The pipeline step with a condition
+    :return: The compiled condition
+    """
+    compiled_condition = _compiled_conditions.get(pipeline_step.id)
+    references = list(pipeline_step.inputs or [])
+
+    if (
+        compiled_condition is None
+        or compiled_condition.source != pipeline_step.condition
+        or compiled_condition.references != references
+    ):
+        compiled_condition = CompiledCondition(pipeline_step.condition, references)
+        _compiled_conditions[pipeline_step.id] = compiled_condition
+
+    return compiled_condition
+
+
+def invalidate_compiled_conditions(pipeline_step_ids):
+    """
+    Remove the compiled conditions of pipeline steps
+    :param pipeline_step_ids: The ids of the pipeline steps
+    """
+    for pipeline_step_id in pipeline_step_ids:
+        _compiled_conditions.pop(pipeline_step_id, None)
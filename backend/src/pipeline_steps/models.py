@@ -34,13 +34,13 @@ class PipelineStep(
     __tablename__ = "pipeline_steps"
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    pipeline_id: Optional[UUID] = Field(foreign_key="pipelines.id")
+    pipeline_id: Optional[UUID] = Field(foreign_key="pipelines.id", index=True)
     pipeline: "Pipeline" = Relationship(back_populates="steps")  # noqa F821
     pipeline_executions: List["PipelineExecution"] = Relationship(
         sa_relationship_kwargs={"cascade": "delete"},
         back_populates="current_pipeline_step",
     )  # noqa F821
-    service_id: Optional[UUID] = Field(foreign_key="services.id")
+    service_id: Optional[UUID] = Field(foreign_key="services.id", index=True)
     service: Service = Relationship(back_populates="pipeline_steps")
 
 
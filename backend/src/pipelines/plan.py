@@ -0,0 +1,105 @@
+import graphlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+from uuid import UUID
+
+_execution_plans: dict[UUID, "ExecutionPlan"] = {}
+
+
+@dataclass(frozen=True)
+class PlannedStep:
+    """
+    Detached copy of the pipeline step attributes needed to run a pipeline execution
+    """
+    id: UUID
+    identifier: str
+    service_id: UUID | None
+    needs: tuple[str, ...]
+    inputs: tuple[str, ...]
+    condition: str | None
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    Immutable execution plan of a pipeline
+    """
+    pipeline_id: UUID
+    # The step ids in the order of the pipeline steps, used to pair legacy tasks with their step
+    step_ids: tuple[UUID, ...]
+    # The step identifiers in topological order
+    order: tuple[str, ...]
+    steps_by_id: Mapping[UUID, PlannedStep]
+    steps_by_identifier: Mapping[str, PlannedStep]
+    # The identifiers of the steps that need a given step
+    dependents: Mapping[str, tuple[str, ...]]
+
+    def get_dependents(self, identifier: str) -> list[PlannedStep]:
+        """
+        Get the steps that need a given step
+        :param identifier: The identifier of the step
+        :return: The dependent steps in topological order
+        """
+        return [self.steps_by_identifier[dependent] for dependent in self.dependents.get(identifier, ())]
+
+
+def create_execution_plan(pipeline) -> ExecutionPlan:
+    """
+    Create the execution plan of a pipeline
+    :param pipeline: The pipeline
+    :return: The execution plan
+    """
+    steps = [
+        PlannedStep(
+            id=step.id,
+            identifier=step.identifier,
+            service_id=step.service_id,
+            needs=tuple(step.needs or []),
+            inputs=tuple(step.inputs or []),
+            condition=step.condition,
+        )
+        for step in pipeline.steps
+    ]
+
+    order = tuple(graphlib.TopologicalSorter({step.identifier: step.needs for step in steps}).static_order())
+    position = {identifier: index for index, identifier in enumerate(order)}
+
+    dependents = {}
+    for step in steps:
+        for need in step.needs:
+            dependents.setdefault(need, []).append(step.identifier)
+
+    return ExecutionPlan(
+        pipeline_id=pipeline.id,
+        step_ids=tuple(step.id for step in steps),
+        order=order,
+        steps_by_id=MappingProxyType({step.id: step for step in steps}),
+        steps_by_identifier=MappingProxyType({step.identifier: step for step in steps}),
+        dependents=MappingProxyType({
+            need: tuple(sorted(identifiers, key=position.__getitem__)) for need, identifiers in dependents.items()
+        }),
+    )
+
+
+def get_execution_plan(pipeline) -> ExecutionPlan:
+    """
+    Get the execution plan of a pipeline, creating it on first use
+    :param pipeline: The pipeline
+    :return: The execution plan
+    """
+    execution_plan = _execution_plans.get(pipeline.id)
+
+    if execution_plan is None or execution_plan.step_ids != tuple(step.id for step in pipeline.steps):
+        execution_plan = create_execution_plan(pipeline)
+        _execution_plans[pipeline.id] = execution_plan
+
+    return execution_plan
+
+
+def invalidate_execution_plan(pipeline_id: UUID):
+    """
+    Remove the execution plan of a pipeline
+    :param pipeline_id: The id of the pipeline
+    """
+    _execution_plans.pop(pipeline_id, None)
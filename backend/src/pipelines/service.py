@@ -1,5 +1,4 @@
 import asyncio
-import json
 import re
 import graphlib
 from fastapi import FastAPI, UploadFile, Depends, HTTPException
@@ -7,8 +6,9 @@ from fastapi.responses import JSONResponse
 from inspect import Parameter, Signature
 from makefun import with_signature
 from common.functions import get_example_filename
+from common.queries import count_rows, find_page_with_total_count
 from execution_units.enums import ExecutionUnitStatus
-from services.models import Service, ServiceTask
+from services.models import Service
 from storage.service import StorageService
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Session, select, desc, col, or_, and_, cast
@@ -18,17 +18,25 @@ from common_code.common.models import ExecutionUnitTag
 from common_code.common.enums import FieldDescriptionType, ExecutionUnitTagName, ExecutionUnitTagAcronym
 from uuid import UUID
 from pipeline_steps.models import PipelineStep, PipelineStepCreate
+from pipeline_steps.conditions import CompiledCondition, get_compiled_condition, invalidate_compiled_conditions
 from pipelines.models import Pipeline, PipelineUpdate, PipelineCreate
-from common.exceptions import NotFoundException, InconsistentPipelineException, ConflictException
+from pipelines.plan import invalidate_execution_plan
+from common.exceptions import (
+    NotFoundException,
+    InconsistentPipelineException,
+    ConflictException,
+    InvalidConditionException,
+)
 from pipeline_executions.models import FileKeyReference, PipelineExecution, PipelineExecutionReadWithPipelineAndTasks
 from pipeline_executions.service import PipelineExecutionsService
 from tasks.enums import TaskStatus
 from tasks.models import Task, TaskUpdate
-from tasks.service import TasksService, sanitize
+from tasks.service import TasksService
 from config import Settings, get_settings
 from services.service import ServicesService
 from httpx import HTTPError
 from http_client import HttpClient
+from route_registry import get_route_registry
 from fastapi.encoders import jsonable_encoder
 
 REGISTERED_PIPELINES_TAG = "Registered Pipelines"
@@ -116,8 +124,7 @@ class PipelinesService:
         :return: The number of pipelines.
         """
         self.logger.debug("Get the number of pipelines.")
-        count = self.session.exec(statement)
-        return len([pipeline for pipeline in count])
+        return count_rows(self.session, statement)
 
     def create_statement(
             self,
@@ -218,15 +225,7 @@ class PipelinesService:
 
         statement = self.create_statement(search, order_by, order, tags, status)
 
-        statement_to_count = statement
-
-        statement = statement.offset(skip).limit(limit)
-
-        pipelines = self.session.exec(statement).all()
-
-        total_count = self.get_count(statement_to_count)
-
-        return total_count, pipelines
+        return find_page_with_total_count(self.session, statement, skip, limit)
 
     def find_many(
             self,
@@ -561,6 +560,7 @@ class PipelinesService:
 
         # Update/Add/Delete Steps
         existing_step_identifiers = {step.identifier for step in current_pipeline.steps}
+        existing_step_ids = [step.id for step in current_pipeline.steps]
         updated_step_ids = set()
 
         for step_data in pipeline_data["steps"]:
@@ -641,6 +641,10 @@ class PipelinesService:
 
         self.session.commit()
 
+        # Drop the execution plan and the compiled conditions of the previous steps
+        invalidate_execution_plan(pipeline_id)
+        invalidate_compiled_conditions(existing_step_ids)
+
         # Update OpenAPI route
         self.remove_route(app, old_pipeline_slug)
         self.enable_pipeline(app, current_pipeline)
@@ -658,9 +662,12 @@ class PipelinesService:
         current_pipeline = self.session.get(Pipeline, pipeline_id)
         if not current_pipeline:
             raise NotFoundException("Pipeline Not Found")
+        step_ids = [step.id for step in current_pipeline.steps]
         self.session.delete(current_pipeline)
         self.remove_route(app, current_pipeline.slug)
         self.session.commit()
+        invalidate_execution_plan(pipeline_id)
+        invalidate_compiled_conditions(step_ids)
         self.logger.debug(f"Deleted pipeline with id {current_pipeline.id}")
 
     def remove_route(self, app: FastAPI, slug: str):
@@ -669,12 +676,8 @@ class PipelinesService:
         :param app: FastAPI reference
         :param slug: Slug of the route to remove
         """
-        for route in app.routes:
-            if route.path == f"/{slug}":
-                app.routes.remove(route)
-                self.logger.debug(f"Route {route.path} removed from FastAPI app")
-                app.openapi_schema = None
-                break
+        if get_route_registry(app).remove(slug):
+            self.logger.debug(f"Route /{slug} removed from FastAPI app")
 
     def enable_pipelines(self, app: FastAPI):
         """
@@ -692,15 +695,10 @@ class PipelinesService:
         :param app: FastAPI reference
         :param pipeline: Pipeline to enable
         """
-        is_pipeline_route_present = False
-
-        for route in app.routes:
-            if route.path == f"/{pipeline.slug}":
-                is_pipeline_route_present = True
-                break
+        route_registry = get_route_registry(app)
 
         # Add the route to the app if not present
-        if not is_pipeline_route_present:
+        if pipeline.slug not in route_registry:
             # Create the `handler` signature from pipeline's `data_in_fields`
             handler_params = []
             for data_in_field in pipeline.data_in_fields:
@@ -860,26 +858,20 @@ class PipelinesService:
                     # Optional condition evaluation on txt/json inputs
                     should_post_task = True
                     if init_step.condition:
-                        condition = init_step.condition
+                        compiled_condition = get_compiled_condition(init_step)
                         files_mapping = {}
-                        for ref in (init_step.inputs or []):
+                        for ref in compiled_condition.aliases:
                             fk = files_by_ref.get(ref)
                             if not fk:
                                 continue
-                            alias = re.sub(r"[-.]", "_", ref)
                             ext = fk.rsplit(".", 1)[-1].lower() if "." in fk else ""
+                            if ext not in ("txt", "json"):
+                                continue
                             try:
-                                content_bytes = await self.storage_service.get_file_as_bytes(fk)
-                                if ext == "txt":
-                                    files_mapping[alias] = content_bytes.decode("utf-8")
-                                    condition = condition.replace(ref, alias)
-                                elif ext == "json":
-                                    files_mapping[alias] = json.loads(content_bytes.decode("utf-8"))
-                                    condition = condition.replace(ref, alias)
+                                files_mapping[ref] = await self.storage_service.get_decoded_file(fk)
                             except Exception as e:
                                 self.logger.error(f"Could not download file {fk} from storage: {e}")
-                        condition_clean = sanitize(condition)
-                        if not eval(condition_clean, {}, files_mapping):
+                        if not compiled_condition.evaluate(files_mapping):
                             should_post_task = False
 
                     if should_post_task:
@@ -888,15 +880,7 @@ class PipelinesService:
                         task.data_out = None
                         task = await self.tasks_service.update(task.id, task)
 
-                        service_task = ServiceTask(
-                            s3_access_key_id=self.settings.s3_access_key_id,
-                            s3_secret_access_key=self.settings.s3_secret_access_key,
-                            s3_region=self.settings.s3_region,
-                            s3_host=self.settings.s3_host,
-                            s3_bucket=self.settings.s3_bucket,
-                            task=task,
-                            callback_url=f"{self.settings.host}/tasks/{task.id}"
-                        )
+                        service_task = await self.tasks_service.create_service_task(task, service)
                         payload = jsonable_encoder(service_task, custom_encoder={EnumEncoder: lambda e: e.value})
                         post_coroutines.append(self.http_client.post(f"{service.url}/compute", json=payload))
                     else:
@@ -924,8 +908,8 @@ class PipelinesService:
                 # Return created pipeline execution
                 return pipeline_execution
 
-            app.add_api_route(
-                f"/{pipeline.slug}",
+            route_registry.add(
+                pipeline.slug,
                 handler,
                 methods=["POST"],
                 summary=pipeline.summary,
@@ -937,7 +921,6 @@ class PipelinesService:
                 },
                 response_model=PipelineExecutionReadWithPipelineAndTasks
             )
-            app.openapi_schema = None
 
     def disable_pipeline(self, app: FastAPI, pipeline: Pipeline):
         """
@@ -1093,6 +1076,14 @@ class PipelinesService:
                             f"WARNING: The identifier {need} is not used in the inputs of the current step "
                             f"({node}). It should be removed from the needs.")
 
+                # Check if the condition only uses the inputs of the current step
+                if step_found.condition:
+                    try:
+                        CompiledCondition(step_found.condition, inputs)
+                    except InvalidConditionException as e:
+                        raise InconsistentPipelineException(
+                            f"The condition of the step {node} is not valid: {e.message}")
+
             # Mark the nodes as done
             ts.done(*node_group)
 
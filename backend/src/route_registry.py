@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+from typing import Dict, List
+from fastapi import FastAPI, Request, Response
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute, Route
+
+
+class RouteRegistry:
+    """
+    Routes of the registered services and pipelines indexed by slug.
+    Every change increments the version of the routes. The OpenAPI schema of a new version is generated in the
+    background, the last generated schema is served with an ETag until the new one is ready.
+    """
+
+    def __init__(self, app: FastAPI, schema_generation_delay: float = 0.5):
+        self.app = app
+        self.routes: Dict[str, APIRoute] = {}
+        self.version = 0
+        # Wait for the routes to stop changing before generating the schema
+        self.schema_generation_delay = schema_generation_delay
+        self.schema = None
+        self.schema_body = None
+        self.schema_etag = None
+        self.schema_version = None
+        self.schema_generations = 0
+        self.schema_task = None
+
+        app.openapi = self.openapi
+        self.replace_openapi_route()
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.routes
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def add(self, slug: str, endpoint, **kwargs) -> APIRoute:
+        """
+        Add the route of a service or pipeline
+        :param slug: The slug of the service or pipeline
+        :param endpoint: The route handler
+        :param kwargs: The arguments of FastAPI's add_api_route
+        :return: The added route
+        """
+        self.app.add_api_route(f"/{slug}", endpoint, **kwargs)
+        route = self.app.router.routes[-1]
+        self.routes[slug] = route
+        self.changed()
+
+        return route
+
+    def remove(self, slug: str) -> bool:
+        """
+        Remove the route of a service or pipeline
+        :param slug: The slug of the service or pipeline
+        :return: True if the route was registered
+        """
+        route = self.routes.pop(slug, None)
+        if route is None:
+            return False
+
+        self.app.router.routes.remove(route)
+        self.changed()
+
+        return True
+
+    def changed(self):
+        self.version += 1
+
+        # Outside the event loop, the schema is generated on the next request
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self.schedule_schema_generation()
+
+    def schedule_schema_generation(self):
+        if self.schema_task is None or self.schema_task.done():
+            self.schema_task = asyncio.ensure_future(self.generate_schema_in_background())
+
+    async def generate_schema_in_background(self):
+        await asyncio.sleep(self.schema_generation_delay)
+
+        while self.schema_version != self.version:
+            await self.refresh_schema()
+
+    async def refresh_schema(self):
+        """
+        Generate the OpenAPI schema of the current routes in a thread
+        """
+        version = self.version
+        routes = list(self.app.routes)
+
+        schema = await asyncio.to_thread(self.generate_schema, routes)
+        self.set_schema(schema, version)
+
+    def generate_schema(self, routes: List[BaseRoute]):
+        return get_openapi(
+            title=self.app.title,
+            version=self.app.version,
+            openapi_version=self.app.openapi_version,
+            summary=self.app.summary,
+            description=self.app.description,
+            terms_of_service=self.app.terms_of_service,
+            contact=self.app.contact,
+            license_info=self.app.license_info,
+            routes=routes,
+            webhooks=self.app.webhooks.routes,
+            tags=self.app.openapi_tags,
+            servers=self.app.servers,
+            separate_input_output_schemas=self.app.separate_input_output_schemas,
+            external_docs=self.app.openapi_external_docs,
+        )
+
+    def set_schema(self, schema, version: int):
+        # A schema of older routes must not replace a newer one
+        if self.schema_version is not None and version < self.schema_version:
+            return
+
+        self.schema = schema
+        self.schema_body = JSONResponse(schema).body
+        self.schema_etag = f'"{hashlib.sha256(self.schema_body).hexdigest()[:32]}"'
+        self.schema_version = version
+        self.schema_generations += 1
+        self.app.openapi_schema = schema
+
+    def openapi(self):
+        if self.schema_version != self.version:
+            self.set_schema(self.generate_schema(list(self.app.routes)), self.version)
+
+        return self.schema
+
+    def replace_openapi_route(self):
+        """
+        Serve the OpenAPI schema with an ETag, in place of the route added by FastAPI
+        """
+        if not self.app.openapi_url:
+            return
+
+        for index, route in enumerate(self.app.router.routes):
+            if isinstance(route, Route) and route.path == self.app.openapi_url:
+                self.app.router.routes[index] = Route(
+                    self.app.openapi_url, self.openapi_endpoint, include_in_schema=False
+                )
+                break
+
+    async def openapi_endpoint(self, request: Request) -> Response:
+        if self.schema is None:
+            await self.refresh_schema()
+        elif self.schema_version != self.version:
+            self.schedule_schema_generation()
+
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        if root_path and self.app.root_path_in_servers:
+            server_urls = {server.get("url") for server in self.schema.get("servers", [])}
+            if root_path not in server_urls:
+                schema = dict(self.schema)
+                schema["servers"] = [{"url": root_path}] + schema.get("servers", [])
+                return JSONResponse(schema)
+
+        headers = {"ETag": self.schema_etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self.schema_etag in [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(self.schema_body, media_type="application/json", headers=headers)
+
+
+def get_route_registry(app: FastAPI) -> RouteRegistry:
+    """
+    Get the route registry of an app, creating it on first use
+    :param app: The FastAPI app
+    :return: The route registry
+    """
+    if not hasattr(app.state, "route_registry"):
+        app.state.route_registry = RouteRegistry(app)
+
+    return app.state.route_registry
@@ -1,4 +1,3 @@
-from datetime import datetime
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import PlainTextResponse
@@ -6,7 +5,8 @@ from common.exceptions import NotFoundException, ConflictException, ConstraintEx
 from execution_units.enums import ExecutionUnitStatus
 from services.service import ServicesService
 from common.query_parameters import QueryParameters
-from services.models import ServiceRead, ServiceUpdate, ServiceCreate, Service, ServicesWithCount
+from services.models import ServiceRead, ServiceUpdate, ServiceCreate, Service, ServicesWithCount, ServicesPing, \
+    ServicesPingRead
 from uuid import UUID
 from sqlalchemy.exc import CompileError
 import textwrap
@@ -276,9 +276,24 @@ def heartbeat_endpoint(
         service_slug: str,
         services_service: ServicesService = Depends(),
 ):
-    service = services_service.find_one_by_slug(service_slug)
-    if not service:
+    if not services_service.ping([service_slug]):
         raise HTTPException(status_code=404, detail="Service Not Found")
 
-    now = datetime.now()
-    services_service.update(service.id, ServiceUpdate(latest_ping=now))
+
+@router.post(
+    "/services/ping",
+    summary="Services health check endpoint for many services",
+    responses={
+        200: {"detail": "Heartbeats recorded"},
+    },
+    response_model=ServicesPingRead,
+    status_code=200
+)
+def batch_heartbeat_endpoint(
+        services_ping: ServicesPing,
+        services_service: ServicesService = Depends(),
+):
+    pinged = services_service.ping(services_ping.slugs)
+    not_found = [slug for slug in services_ping.slugs if slug not in pinged]
+
+    return ServicesPingRead(pinged=pinged, not_found=not_found)
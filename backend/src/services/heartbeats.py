@@ -0,0 +1,92 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, select, col
+from services.models import Service
+
+
+class HeartbeatBuffer:
+    """
+    Latest heartbeat of each service, kept in memory and written to the database in bulk
+    """
+
+    def __init__(self):
+        # The ids of the services by slug, to avoid a query per heartbeat
+        self.service_ids: Dict[str, UUID] = {}
+        self.pings: Dict[UUID, datetime] = {}
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+
+    def get_service_ids(self, session: Session, slugs: List[str]) -> Dict[str, UUID]:
+        """
+        Get the ids of services from their slugs
+        :param session: The database session
+        :param slugs: The slugs of the services
+        :return: The ids of the existing services by slug
+        """
+        unknown_slugs = [slug for slug in slugs if slug not in self.service_ids]
+
+        if unknown_slugs:
+            rows = session.exec(select(Service.id, Service.slug).where(col(Service.slug).in_(unknown_slugs))).all()
+            for service_id, slug in rows:
+                self.service_ids[slug] = service_id
+
+        return {slug: self.service_ids[slug] for slug in slugs if slug in self.service_ids}
+
+    def add(self, service_id: UUID, ping_time: datetime):
+        self.pings[service_id] = ping_time
+        self.received += 1
+
+    def forget(self, slug: str):
+        """
+        Forget a service that was deleted or whose slug changed
+        :param slug: The slug of the service
+        """
+        service_id = self.service_ids.pop(slug, None)
+        if service_id is not None:
+            self.pings.pop(service_id, None)
+
+    def flush(self, session: Session) -> int:
+        """
+        Write the buffered heartbeats to the database in a single statement
+        :param session: The database session
+        :return: The number of heartbeats written
+        """
+        if not self.pings:
+            return 0
+
+        pings, self.pings = self.pings, {}
+        table = Service.__table__
+        statement = update(table).where(table.c.id == bindparam("service_id")).values(
+            latest_ping=bindparam("ping_time")
+        )
+
+        try:
+            result = session.connection().execute(
+                statement,
+                [{"service_id": service_id, "ping_time": ping_time} for service_id, ping_time in pings.items()],
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            # Keep the heartbeats for the next flush, unless a newer one was received
+            for service_id, ping_time in pings.items():
+                self.pings.setdefault(service_id, ping_time)
+            raise
+
+        # A service was removed without being forgotten, resolve the slugs again on the next heartbeats
+        if 0 <= result.rowcount < len(pings):
+            self.service_ids.clear()
+
+        self.written += len(pings)
+        self.flushes += 1
+
+        return len(pings)
+
+
+@lru_cache()
+def get_heartbeat_buffer():
+    return HeartbeatBuffer()
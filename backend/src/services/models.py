@@ -147,22 +147,26 @@ class ServiceTaskBase(BaseModel):
     """
     Base class for Service task
     This model is used in subclasses
+    The S3 information is not set when the service receives presigned URLs instead
     """
 
-    s3_access_key_id: str
-    s3_secret_access_key: str
-    s3_region: str
-    s3_host: str
-    s3_bucket: str
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_region: Optional[str] = None
+    s3_host: Optional[str] = None
+    s3_bucket: Optional[str] = None
     task: "TaskRead"
     callback_url: AnyHttpUrl
+    data_in_urls: Optional[List[str]] = None
+    data_out_keys: Optional[List[str]] = None
+    data_out_urls: Optional[List[str]] = None
 
 
 class ServiceTask(ServiceTaskBase):
     """
     Service task
     This model is sent to the service with the information
-    related to S3 as well as the task to execute
+    related to S3 (credentials or presigned URLs) as well as the task to execute
     """
 
     pass
@@ -178,6 +182,37 @@ class ServicesWithCount(BaseModel):
     services: List[ServiceRead]
 
 
+class ServicesPing(BaseModel):
+    """
+    Services ping model
+    This model is used to send the heartbeat of many services at once
+    """
+
+    slugs: List[str]
+
+
+class ServicesPingRead(BaseModel):
+    """
+    Services ping read model
+    This model is used to return the services whose heartbeat was recorded and the unknown ones
+    """
+
+    pinged: List[str]
+    not_found: List[str]
+
+
+class ServicesAvailabilityStats(BaseModel):
+    """
+    Stats of the last check of the services availability
+    """
+    sweeps: int = 0
+    last_sweep_at: Optional[datetime] = None
+    last_sweep_duration: float = 0.0
+    services_checked: int = 0
+    status_changes: int = 0
+    timeouts: int = 0
+
+
 from pipeline_steps.models import PipelineStep  # noqa E402
 from tasks.models import Task, TaskRead  # noqa E402
 
@@ -1,4 +1,7 @@
+import asyncio
+import time
 from inspect import Parameter, Signature
+from typing import List
 from sqlalchemy.exc import IntegrityError
 from common_code.common.models import ExecutionUnitTag
 from common_code.common.enums import ExecutionUnitTagName, ExecutionUnitTagAcronym
@@ -7,6 +10,7 @@ from fastapi.responses import JSONResponse
 from makefun import with_signature
 from uuid import UUID
 from common.functions import get_example_filename
+from common.queries import count_rows, find_page_with_total_count
 from execution_units.enums import ExecutionUnitStatus
 from storage.service import StorageService
 from tasks.service import TasksService
@@ -16,15 +20,23 @@ from sqlmodel import Session, select, desc, col, or_, and_, cast
 from database import get_session
 from common_code.logger.logger import Logger, get_logger
 from config import Settings, get_settings
-from services.models import Service, ServiceUpdate, ServiceTask
+from services.models import Service, ServiceUpdate, ServicesAvailabilityStats
+from services.heartbeats import get_heartbeat_buffer
 from common.exceptions import NotFoundException, ConflictException, UnreachableException, ConstraintException
 from http_client import HttpClient
+from route_registry import get_route_registry
 from fastapi.encoders import jsonable_encoder
 from httpx import HTTPError
 from datetime import datetime, timezone
 
 REGISTERED_SERVICES_TAG = "Registered Services"
 
+_services_availability_stats = ServicesAvailabilityStats()
+
+
+def get_services_availability_stats():
+    return _services_availability_stats
+
 
 class ServicesService:
     def __init__(
@@ -42,6 +54,7 @@ class ServicesService:
         self.settings = settings
         self.session = session
         self.http_client = http_client
+        self.heartbeat_buffer = get_heartbeat_buffer()
 
         self.logger.set_source(__name__)
 
@@ -51,8 +64,7 @@ class ServicesService:
         :return: The number of services.
         """
         self.logger.debug("Get the number of services.")
-        count = self.session.exec(statement)
-        return len([service for service in count])
+        return count_rows(self.session, statement)
 
     def create_statement(
             self,
@@ -164,15 +176,7 @@ class ServicesService:
 
         statement = self.create_statement(search, order_by, order, tags, ai, status)
 
-        statement_to_count = statement
-
-        statement = statement.offset(skip).limit(limit)
-
-        services = self.session.exec(statement).all()
-
-        total_count = self.get_count(statement_to_count)
-
-        return total_count, services
+        return find_page_with_total_count(self.session, statement, skip, limit)
 
     def find_many(
             self,
@@ -286,6 +290,7 @@ class ServicesService:
             raise NotFoundException("Service Not Found")
         service_data = service.model_dump(exclude_unset=True)
         self.logger.debug(f"Updating service {service_id} with data: {service_data}")
+        self.heartbeat_buffer.forget(current_service.slug)
         for key, value in service_data.items():
             if key == "url":
                 # stringify the url and remove the trailing slash
@@ -317,16 +322,39 @@ class ServicesService:
         except IntegrityError:
             raise ConstraintException(
                 "Service is linked to a pipeline, please update the related step in the pipeline first.")
+        self.heartbeat_buffer.forget(current_service.slug)
         self.logger.debug(f"Deleted service with id {current_service.id}")
 
+    def ping(self, service_slugs: List[str]) -> List[str]:
+        """
+        Record the heartbeat of services, the heartbeats are written to the database by flush_heartbeats.
+        :param service_slugs: The slugs of the services.
+        :return: The slugs of the services found.
+        """
+        service_ids = self.heartbeat_buffer.get_service_ids(self.session, service_slugs)
+        now = datetime.now()
+
+        for service_id in service_ids.values():
+            self.heartbeat_buffer.add(service_id, now)
+
+        return list(service_ids)
+
+    async def flush_heartbeats(self):
+        """
+        Write the buffered heartbeats of the services to the database.
+        """
+        try:
+            written = self.heartbeat_buffer.flush(self.session)
+        except Exception as e:
+            self.logger.error(f"Could not write the heartbeats of the services: {str(e)}")
+        else:
+            if written:
+                self.logger.debug(f"Wrote the heartbeat of {written} services")
+
     def remove_route(self, app: FastAPI, slug: str):
         # Delete the service route from the app
-        for route in app.routes:
-            if route.path == f"/{slug}":
-                app.routes.remove(route)
-                self.logger.debug(f"Route {route.path} removed from FastAPI app")
-                app.openapi_schema = None
-                break
+        if get_route_registry(app).remove(slug):
+            self.logger.debug(f"Route /{slug} removed from FastAPI app")
 
     def enable_service(self, app: FastAPI, service: Service):
         """
@@ -336,15 +364,10 @@ class ServicesService:
         """
         self.logger.info(f"Enabling service {service.name}")
 
-        is_service_route_present = False
-
-        for route in app.routes:
-            if route.path == f"/{service.slug}":
-                is_service_route_present = True
-                break
+        route_registry = get_route_registry(app)
 
         # Add the route to the app if not present
-        if not is_service_route_present:
+        if service.slug not in route_registry:
             # Create the `handler` signature from service's `data_in_fields`
             handler_params = []
             for data_in_field in service.data_in_fields:
@@ -422,15 +445,7 @@ class ServicesService:
                 task = self.tasks_service.create(task)
 
                 # Create the service task
-                service_task = ServiceTask(
-                    s3_access_key_id=self.settings.s3_access_key_id,
-                    s3_secret_access_key=self.settings.s3_secret_access_key,
-                    s3_region=self.settings.s3_region,
-                    s3_host=self.settings.s3_host,
-                    s3_bucket=self.settings.s3_bucket,
-                    task=task,
-                    callback_url=f"{self.settings.host}/tasks/{task.id}"
-                )
+                service_task = await self.tasks_service.create_service_task(task, service)
 
                 async def clean_up():
                     self.logger.debug("Removing files from storage...")
@@ -480,8 +495,8 @@ class ServicesService:
             # Enable pipelines linked to the service via pipeline steps
             self.enable_pipelines_linked_to_service(service)
 
-            app.add_api_route(
-                f"/{service.slug}",
+            route_registry.add(
+                service.slug,
                 handler,
                 methods=["POST"],
                 summary=service.summary,
@@ -493,7 +508,6 @@ class ServicesService:
                 },
                 response_model=TaskReadWithServiceAndPipeline,
             )
-            app.openapi_schema = None
 
     def disable_service(self, app: FastAPI, service: Service):
         """
@@ -561,24 +575,32 @@ class ServicesService:
           - else SLEEPING present => pipeline SLEEPING
           - else pipeline AVAILABLE
         """
-        self.logger.debug(f"Refreshing pipelines status linked to service {service.id}")
+        self.refresh_status_for_pipelines_linked_to_services([service])
 
+    def refresh_status_for_pipelines_linked_to_services(self, services: List[Service]):
+        """
+        Refresh status of pipelines linked to services, committing the changes once.
+        :param services: The services whose pipelines are refreshed
+        """
         updated = False
         seen_pipeline_ids = set()
 
-        for pipeline_step in service.pipeline_steps:
-            pipeline = pipeline_step.pipeline
-            if not pipeline or pipeline.id in seen_pipeline_ids:
-                continue
+        for service in services:
+            self.logger.debug(f"Refreshing pipelines status linked to service {service.id}")
+
+            for pipeline_step in service.pipeline_steps:
+                pipeline = pipeline_step.pipeline
+                if not pipeline or pipeline.id in seen_pipeline_ids:
+                    continue
 
-            seen_pipeline_ids.add(pipeline.id)
-            next_status = self._compute_pipeline_status(pipeline)
+                seen_pipeline_ids.add(pipeline.id)
+                next_status = self._compute_pipeline_status(pipeline)
 
-            if pipeline.status != next_status:
-                pipeline.status = next_status
-                self.session.add(pipeline)
-                updated = True
-                self.logger.debug(f"Pipeline {pipeline.name} status set to {pipeline.status.value}")
+                if pipeline.status != next_status:
+                    pipeline.status = next_status
+                    self.session.add(pipeline)
+                    updated = True
+                    self.logger.debug(f"Pipeline {pipeline.name} status set to {pipeline.status.value}")
 
         if updated:
             self.session.commit()
@@ -606,42 +628,84 @@ class ServicesService:
         :param app: the FastAPI app reference
         """
         self.logger.info("Checking services availability...")
-        services = self.find_many()
+        start = time.perf_counter()
+
+        # Write the buffered heartbeats before reading them
+        await self.flush_heartbeats()
+        services = self.session.exec(select(Service)).all()
+        services_to_check = []
+
+        for service in services:
+            if service.status == ExecutionUnitStatus.DISABLED:
+                self.logger.info(f"Service {service.name} ({service.slug}) is disabled, skipping...")
+            else:
+                services_to_check.append(service)
 
         if len(services) == 0:
             self.logger.info("No services in database.")
-        else:
-            for service in services:
-                if service.status == ExecutionUnitStatus.DISABLED:
-                    self.logger.info(f"Service {service.name} ({service.slug}) is disabled, skipping...")
-                    continue
+
+        # Run the checks concurrently, a check that takes too long leaves the service unchanged
+        semaphore = asyncio.Semaphore(self.settings.check_services_availability_concurrency)
+
+        async def check(service_to_check: Service):
+            async with semaphore:
                 try:
-                    await self.check_service_last_heartbeat(service)
-                except HTTPException as e:
-                    # Todo: decide if we want to set the service as unavailable or sleeping.
-                    self.logger.warning(f"Service {service.name} ({service.slug}) did not return an OK: {str(e)}")
-                    # self.disable_service(app, service)
-                except UnreachableException as e:
-                    # Todo: decide if we want to set the service as unavailable or sleeping.
-                    self.logger.warning(f"Service {service.name} ({service.slug}) unreachable: {str(e)}")
-                    # self.disable_service(app, service)
-                else:
-                    self.logger.info(f"Service {service.name} ({service.slug}) reachable and OK")
-                    updated_service = self.update(service.id, ServiceUpdate(status=ExecutionUnitStatus.AVAILABLE))
-                    self.enable_service(app, updated_service)
+                    return await asyncio.wait_for(
+                        self.check_service_last_heartbeat(service_to_check),
+                        timeout=self.settings.check_services_availability_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    self.logger.warning(
+                        f"Service {service_to_check.name} ({service_to_check.slug}) availability check timed out"
+                    )
+                    return None
 
-    async def check_service_last_heartbeat(self, service: Service):
+        statuses = await asyncio.gather(*[check(service) for service in services_to_check])
+
+        # Write the status changes in one batch
+        changed_services = []
+        for service, status in zip(services_to_check, statuses):
+            if status is not None and status != service.status:
+                service.status = status
+                self.session.add(service)
+                changed_services.append(service)
+
+        if changed_services:
+            self.session.commit()
+            self.refresh_status_for_pipelines_linked_to_services(changed_services)
+
+        # Add the routes of the available services
+        route_registry = get_route_registry(app)
+        for service, status in zip(services_to_check, statuses):
+            if status == ExecutionUnitStatus.AVAILABLE:
+                self.logger.info(f"Service {service.name} ({service.slug}) reachable and OK")
+                if service.slug not in route_registry:
+                    self.enable_service(app, service)
+
+        duration = time.perf_counter() - start
+        _services_availability_stats.sweeps += 1
+        _services_availability_stats.last_sweep_at = datetime.now(timezone.utc)
+        _services_availability_stats.last_sweep_duration = duration
+        _services_availability_stats.services_checked = len(services_to_check)
+        _services_availability_stats.status_changes = len(changed_services)
+        _services_availability_stats.timeouts = statuses.count(None)
+
+        self.logger.info(
+            f"Checked {len(services_to_check)} services availability in {duration:.3f} seconds "
+            f"({len(changed_services)} status changes)"
+        )
+
+    async def check_service_last_heartbeat(self, service: Service) -> ExecutionUnitStatus:
         """
-        Check the last heartbeat of a service and set it as sleeping if the heartbeat is too old.
+        Check the last heartbeat of a service, a service without a recent heartbeat is sleeping.
         :param service: The service to check.
+        :return: The status of the service.
         """
         self.logger.debug(f"Checking last heartbeat of service {service.name}")
 
         if not service.latest_ping:
-            self.logger.warning(f"Service {service.name} has no heartbeat, setting it as sleeping")
-            updated_service = self.update(service.id, ServiceUpdate(status=ExecutionUnitStatus.SLEEPING))
-            self.refresh_status_for_pipelines_linked_to_service(updated_service)
-            raise HTTPException(status_code=503, detail="Service has no heartbeat")
+            self.logger.warning(f"Service {service.name} ({service.slug}) has no heartbeat, setting it as sleeping")
+            return ExecutionUnitStatus.SLEEPING
 
         ping_time = service.latest_ping
         if ping_time.tzinfo is None:
@@ -650,14 +714,13 @@ class ServicesService:
 
         if time_since_last_heartbeat > self.settings.check_services_availability_interval + 20:
             self.logger.warning(
-                f"Service {service.name} last heartbeat is too old ({time_since_last_heartbeat} seconds), "
-                f"setting it as sleeping"
+                f"Service {service.name} ({service.slug}) last heartbeat is too old "
+                f"({time_since_last_heartbeat} seconds), setting it as sleeping"
             )
-            updated_service = self.update(service.id, ServiceUpdate(status=ExecutionUnitStatus.SLEEPING))
-            self.refresh_status_for_pipelines_linked_to_service(updated_service)
-            raise HTTPException(status_code=503, detail="Service heartbeat too old")
-        else:
-            self.logger.debug(f"Service {service.name} last heartbeat is recent ({time_since_last_heartbeat} seconds)")
+            return ExecutionUnitStatus.SLEEPING
+
+        self.logger.debug(f"Service {service.name} last heartbeat is recent ({time_since_last_heartbeat} seconds)")
+        return ExecutionUnitStatus.AVAILABLE
 
     async def wake_up_service(self, service: Service):
         """
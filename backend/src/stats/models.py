@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from tasks.models import TaskStatus
+from connection_manager.models import MessageQueueStats
+from services.models import ServicesAvailabilityStats
 from pydantic import BaseModel
 
 
@@ -31,3 +33,5 @@ class StatsBase(BaseModel):
     total: int
     summary: List[StatusCount]
     services: List[ServiceStats]
+    message_queue: Optional[MessageQueueStats] = None
+    services_availability: Optional[ServicesAvailabilityStats] = None
@@ -1,19 +1,23 @@
 from services.models import Service
+from services.service import get_services_availability_stats
 from stats.models import StatsBase, ServiceStats, StatusCount
 from tasks.models import TaskStatus
 from common_code.logger.logger import Logger, get_logger
 from fastapi import Depends
 from sqlmodel import Session, func, select
 from database import get_session
+from connection_manager.connection_manager import ConnectionManager, get_connection_manager
 from tasks.models import Task
 
 
 class StatsService:
     def __init__(self, logger: Logger = Depends(get_logger),
-                 session: Session = Depends(get_session)):
+                 session: Session = Depends(get_session),
+                 connection_manager: ConnectionManager = Depends(get_connection_manager)):
         self.logger = logger
         self.logger.set_source(__name__)
         self.session = session
+        self.connection_manager = connection_manager
 
     def stats(self):
         """
@@ -75,4 +79,10 @@ class StatsService:
         # Add the total number of tasks to the StatsBase object
         stats.total = sum([status_count.count for status_count in stats.summary])
 
+        # Add the state of the queue of the websocket messages that could not be sent
+        stats.message_queue = self.connection_manager.message_queue.stats()
+
+        # Add the stats of the last check of the services availability
+        stats.services_availability = get_services_availability_stats()
+
         return stats
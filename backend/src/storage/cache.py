@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from config import Settings
+
+_file_cache = None
+
+
+class FileCache:
+    """
+    Least recently used cache of decoded files, bounded by the total size of the cached files.
+    Files are stored under unique keys and never modified, so the cached entries never become stale.
+    """
+
+    def __init__(self, max_size: int, max_file_size: int):
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.entries: OrderedDict[str, tuple[object, int]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        """
+        Get a cached file and mark it as the most recently used
+        :param key: The key of the file
+        :param default: The value returned if the file is not cached
+        :return: The decoded file
+        """
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+    def put(self, key: str, value, size: int):
+        """
+        Cache a file, evicting the least recently used files if the cache is full
+        :param key: The key of the file
+        :param value: The decoded file
+        :param size: The size of the file in bytes
+        """
+        if size > self.max_file_size or size > self.max_size:
+            return
+
+        self.remove(key)
+
+        self.entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def remove(self, key: str):
+        """
+        Remove a file from the cache
+        :param key: The key of the file
+        """
+        entry = self.entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self):
+        """
+        Get the counters of the cache
+        :return: The counters of the cache
+        """
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def get_file_cache(settings: Settings):
+    """Get or create the file cache of the process."""
+    global _file_cache
+
+    if _file_cache is None:
+        _file_cache = FileCache(
+            max_size=settings.file_cache_max_size,
+            max_file_size=settings.file_cache_max_file_size,
+        )
+
+    return _file_cache
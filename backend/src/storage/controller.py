@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
-from common.exceptions import NotFoundException, InternalServerErrorException
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Annotated
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from common.exceptions import NotFoundException, InternalServerErrorException, NotModifiedException, \
+    RangeNotSatisfiableException
 from common_code.logger.logger import get_logger, Logger
 from storage.service import StorageService
-from storage.models import FileRead
+from storage.models import FileRead, FileUrlRead
 
 router = APIRouter()
 
@@ -28,16 +32,43 @@ async def upload(
 @router.get(
     "/storage/{key}",
     summary="Download a file from storage",
+    responses={
+        206: {"detail": "Partial Content"},
+        304: {"detail": "Not Modified"},
+        404: {"detail": "File Not Found"},
+        416: {"detail": "Range Not Satisfiable"},
+        500: {"detail": "Internal Server Error"},
+    },
 )
 async def download(
     key: str,
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    if_modified_since: Annotated[str | None, Header()] = None,
     storage_service: StorageService = Depends(),
     logger: Logger = Depends(get_logger),
 ):
+    # Invalid dates are ignored as stated in RFC 9110
+    modified_since = None
+    if if_modified_since:
+        try:
+            modified_since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+
+    # The file is opened before streaming so that its errors can still be returned
     try:
-        # TODO: Can we move this check in the service file?
-        # It seems an exception thrown in a generator function is not caught.
-        await storage_service.check_if_file_exists(key)
+        file, chunks_generator = await storage_service.open_file(
+            key,
+            range_header=range_header,
+            if_none_match=if_none_match,
+            if_modified_since=modified_since,
+        )
+    except NotModifiedException as e:
+        headers = {"ETag": e.etag} if e.etag else None
+        return Response(status_code=304, headers=headers)
+    except RangeNotSatisfiableException as e:
+        raise HTTPException(status_code=416, detail=str(e))
     except NotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
     except InternalServerErrorException as e:
@@ -45,17 +76,51 @@ async def download(
         raise HTTPException(status_code=500, detail=str(e))
 
     headers = {
-        'Content-Disposition': f'attachment; filename="{key}"'
+        'Content-Disposition': f'attachment; filename="{key}"',
+        'Content-Length': str(file['ContentLength']),
+        'Accept-Ranges': 'bytes',
     }
-
-    chunks_generator = storage_service.get_file_as_chunks(key)
+    if file.get('ETag'):
+        headers['ETag'] = file['ETag']
+    if file.get('LastModified'):
+        headers['Last-Modified'] = format_datetime(file['LastModified'].astimezone(timezone.utc), usegmt=True)
+    if file.get('ContentRange'):
+        headers['Content-Range'] = file['ContentRange']
 
     return StreamingResponse(
         chunks_generator,
+        status_code=file['ResponseMetadata']['HTTPStatusCode'],
         headers=headers,
+        media_type=file.get('ContentType'),
     )
 
 
+@router.get(
+    "/storage/{key}/url",
+    summary="Get a presigned URL to download a file directly from storage",
+    responses={
+        404: {"detail": "File Not Found"},
+        500: {"detail": "Internal Server Error"},
+    },
+    response_model=FileUrlRead,
+)
+async def get_url(
+        key: str,
+        storage_service: StorageService = Depends(),
+        logger: Logger = Depends(get_logger),
+):
+    try:
+        await storage_service.check_if_file_exists(key)
+        url = await storage_service.get_presigned_url(key)
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InternalServerErrorException as e:
+        logger.error(f"Error while generating file URL: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return FileUrlRead(key=key, url=url, expires_in=storage_service.s3_presigned_url_expiration)
+
+
 @router.delete(
     "/storage/{key}",
     summary="Delete a file from storage",
@@ -22,3 +22,12 @@ class FileRead(FileBase):
     This model is used to return a file to the user
     """
     pass
+
+
+class FileUrlRead(FileBase):
+    """
+    File URL read model
+    This model is used to return a presigned URL to download a file directly from storage
+    """
+    url: str
+    expires_in: int
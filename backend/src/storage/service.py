@@ -1,12 +1,23 @@
+import asyncio
+import json
 import os
+from datetime import datetime
+from contextlib import AsyncExitStack, asynccontextmanager
 from fastapi import Depends, UploadFile
 from config import Settings, get_settings
-from common.exceptions import NotFoundException, InternalServerErrorException
+from storage.cache import get_file_cache
+from common.exceptions import NotFoundException, InternalServerErrorException, NotModifiedException, \
+    RangeNotSatisfiableException
 from common_code.logger.logger import Logger, get_logger
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
 from botocore.exceptions import EndpointConnectionError, ClientError
 from uuid import uuid4
 
+# Process-wide S3 client, opened and closed by the application lifespan
+_client = None
+_client_exit_stack: AsyncExitStack | None = None
+
 
 class StorageService:
     FAKE_KEY_ID = '0000-0000-0000-0000'
@@ -23,18 +34,72 @@ class StorageService:
         self.s3_region = settings.s3_region
         self.s3_host = settings.s3_host
         self.s3_bucket = settings.s3_bucket
+        self.s3_max_pool_connections = settings.s3_max_pool_connections
+        self.s3_keepalive_timeout = settings.s3_keepalive_timeout
+        self.s3_multipart_part_size = settings.s3_multipart_part_size
+        self.s3_multipart_concurrency = settings.s3_multipart_concurrency
+        self.s3_presigned_url_expiration = settings.s3_presigned_url_expiration
+        self.file_cache = get_file_cache(settings)
+
+    def create_client(self):
+        """
+        Create a new S3 client context with the configured connection pool
+        :return: The client context manager
+        """
+        config = AioConfig(
+            max_pool_connections=self.s3_max_pool_connections,
+            connector_args={"keepalive_timeout": self.s3_keepalive_timeout},
+        )
+
+        return get_session().create_client(
+            's3',
+            region_name=self.s3_region,
+            aws_secret_access_key=self.s3_secret_access_key,
+            aws_access_key_id=self.s3_access_key_id,
+            endpoint_url=self.s3_host,
+            config=config,
+        )
+
+    async def open_client(self):
+        """
+        Open the S3 client shared by all the storage services of the process
+        """
+        global _client, _client_exit_stack
+
+        if _client is None:
+            self.logger.debug("Opening shared storage client")
+            _client_exit_stack = AsyncExitStack()
+            _client = await _client_exit_stack.enter_async_context(self.create_client())
+
+    async def close_client(self):
+        """
+        Close the S3 client shared by all the storage services of the process
+        """
+        global _client, _client_exit_stack
+
+        if _client_exit_stack is not None:
+            self.logger.debug("Closing shared storage client")
+            await _client_exit_stack.aclose()
+
+        _client = None
+        _client_exit_stack = None
+
+    @asynccontextmanager
+    async def client(self):
+        """
+        Get the shared S3 client, or a short-lived one if the shared client is not opened
+        (e.g. outside of the application lifespan)
+        """
+        if _client is not None:
+            yield _client
+        else:
+            async with self.create_client() as client:
+                yield client
 
     async def check_storage_availability(self):
         self.logger.info("Checking storage availability...")
-        session = get_session()
-
-        async with session.create_client(
-                's3',
-                region_name=self.s3_region,
-                aws_secret_access_key=self.s3_secret_access_key,
-                aws_access_key_id=self.s3_access_key_id,
-                endpoint_url=self.s3_host
-        ) as client:
+
+        async with self.client() as client:
             try:
                 # Isn't there a way to check connectivity with the S3 host other than this?
                 await client.get_object(Bucket=self.s3_bucket, Key=self.FAKE_KEY_ID)
@@ -53,95 +118,235 @@ class StorageService:
             original_extension = os.path.splitext(original_filename)[1]
 
             key = f"{uuid4()}{original_extension}"
-            file = await upload_file.read()
+            extra_args = {"ContentType": upload_file.content_type} if upload_file.content_type else {}
 
-            session = get_session()
+            # Files smaller than one part are sent at once, larger ones are streamed part by part
+            first_part = await upload_file.read(self.s3_multipart_part_size)
 
-            async with session.create_client(
-                    's3',
-                    region_name=self.s3_region,
-                    aws_secret_access_key=self.s3_secret_access_key,
-                    aws_access_key_id=self.s3_access_key_id,
-                    endpoint_url=self.s3_host
-            ) as client:
-                await client.put_object(Bucket=self.s3_bucket, Key=key, Body=file)
+            async with self.client() as client:
+                if len(first_part) < self.s3_multipart_part_size:
+                    await client.put_object(Bucket=self.s3_bucket, Key=key, Body=first_part, **extra_args)
+                else:
+                    await self.upload_multipart(client, key, upload_file, first_part, extra_args)
 
             return key
         except ClientError as e:
             self.logger.error(f"Error uploading file: {e}")
             raise InternalServerErrorException("File Cannot Be Uploaded")
 
-    async def check_if_file_exists(self, key):
-        session = get_session()
+    async def upload_multipart(
+            self,
+            client,
+            key: str,
+            upload_file: UploadFile,
+            first_part: bytes,
+            extra_args: dict,
+    ):
+        """
+        Upload a file with S3 multipart upload, reading it part by part.
+        At most `s3_multipart_concurrency` parts are uploaded (and kept in memory) at the same time.
+        :param client: The S3 client
+        :param key: The key of the file
+        :param upload_file: The file to upload, positioned after the first part
+        :param first_part: The first part already read from the file
+        :param extra_args: The extra arguments of the object (e.g. its content type)
+        """
+        multipart_upload = await client.create_multipart_upload(Bucket=self.s3_bucket, Key=key, **extra_args)
+        upload_id = multipart_upload["UploadId"]
 
-        async with session.create_client(
-            's3',
-            region_name=self.s3_region,
-            aws_secret_access_key=self.s3_secret_access_key,
-            aws_access_key_id=self.s3_access_key_id,
-            endpoint_url=self.s3_host
-        ) as client:
+        async def upload_part(part_number: int, body: bytes):
+            response = await client.upload_part(
+                Bucket=self.s3_bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
+
+        parts = []
+        pending = set()
+
+        try:
+            part_number = 1
+            part = first_part
+
+            while part:
+                pending.add(asyncio.ensure_future(upload_part(part_number, part)))
+
+                # Wait for a slot before reading the next part
+                if len(pending) >= self.s3_multipart_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    parts.extend(task.result() for task in done)
+
+                part_number += 1
+                part = await upload_file.read(self.s3_multipart_part_size)
+
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                parts.extend(task.result() for task in done)
+        except Exception:
+            for task in pending:
+                task.cancel()
+            await client.abort_multipart_upload(Bucket=self.s3_bucket, Key=key, UploadId=upload_id)
+            raise
+
+        parts.sort(key=lambda uploaded_part: uploaded_part["PartNumber"])
+
+        await client.complete_multipart_upload(
+            Bucket=self.s3_bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    async def check_if_file_exists(self, key):
+        """
+        Check if a file exists with a HEAD request, which does not transfer the file
+        :param key: The key of the file
+        """
+        async with self.client() as client:
             try:
-                await client.get_object_acl(Bucket=self.s3_bucket, Key=key)
+                await client.head_object(Bucket=self.s3_bucket, Key=key)
             except ClientError as e:
                 self.logger.error(f"Error getting file: {e}")
-                if e.response['Error']['Code'] == 'NoSuchKey':
-                    raise NotFoundException("File Not Found")
-                raise InternalServerErrorException("File Cannot Be Checked")
-            finally:
-                await client.close()
+                if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                    raise InternalServerErrorException("File Cannot Be Checked")
+
+                # A HEAD response has no body to tell a missing file from a missing bucket,
+                # the bucket is only checked on this (uncommon) path
+                try:
+                    await client.head_bucket(Bucket=self.s3_bucket)
+                except ClientError:
+                    raise InternalServerErrorException("File Cannot Be Checked")
+                raise NotFoundException("File Not Found")
 
     async def get_file_as_bytes(
             self,
             key,
     ):
-        session = get_session()
-
-        async with session.create_client(
-            's3',
-            region_name=self.s3_region,
-            aws_secret_access_key=self.s3_secret_access_key,
-            aws_access_key_id=self.s3_access_key_id,
-            endpoint_url=self.s3_host
-        ) as client:
+        async with self.client() as client:
             response = await client.get_object(Bucket=self.s3_bucket, Key=key)
 
             async with response['Body'] as stream:
                 file = await stream.read()
                 return file
 
-    async def get_file_as_chunks(
+    async def get_decoded_file(
             self,
             key,
     ):
-        session = get_session()
+        """
+        Get the content of a text (.txt) or JSON (.json) file decoded, through the file cache
+        :param key: The key of the file
+        :return: The text or the JSON object
+        """
+        missing = object()
+        content = self.file_cache.get(key, missing)
+        if content is not missing:
+            return content
 
-        async with session.create_client(
-            's3',
-            region_name=self.s3_region,
-            aws_secret_access_key=self.s3_secret_access_key,
-            aws_access_key_id=self.s3_access_key_id,
-            endpoint_url=self.s3_host
-        ) as client:
+        file = await self.get_file_as_bytes(key)
+
+        if key.lower().endswith(".json"):
+            content = json.loads(file.decode("utf-8"))
+        else:
+            content = file.decode("utf-8")
+
+        self.file_cache.put(key, content, len(file))
+
+        return content
+
+    async def get_file_as_chunks(
+            self,
+            key,
+    ):
+        async with self.client() as client:
             response = await client.get_object(Bucket=self.s3_bucket, Key=key)
 
             async for chunk in response['Body']:
                 yield chunk
 
+    async def open_file(
+            self,
+            key: str,
+            range_header: str | None = None,
+            if_none_match: str | None = None,
+            if_modified_since: datetime | None = None,
+    ):
+        """
+        Open a file to stream it, optionally partially or conditionally
+        :param key: The key of the file
+        :param range_header: The HTTP range of the file to get
+        :param if_none_match: Only get the file if its ETag is different
+        :param if_modified_since: Only get the file if it has been modified since this date
+        :return: The S3 response (metadata of the file) and the generator of the file chunks,
+                 which must be consumed to release the connection
+        """
+        params = {"Bucket": self.s3_bucket, "Key": key}
+        if range_header:
+            params["Range"] = range_header
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        if if_modified_since:
+            params["IfModifiedSince"] = if_modified_since
+
+        exit_stack = AsyncExitStack()
+        client = await exit_stack.enter_async_context(self.client())
+
+        try:
+            response = await client.get_object(**params)
+        except ClientError as e:
+            await exit_stack.aclose()
+            error_code = e.response['Error']['Code']
+            if error_code in ('304', 'NotModified'):
+                etag = e.response['ResponseMetadata'].get('HTTPHeaders', {}).get('etag')
+                raise NotModifiedException("File Not Modified", etag)
+            if error_code == 'InvalidRange':
+                raise RangeNotSatisfiableException("Range Not Satisfiable")
+            self.logger.error(f"Error getting file: {e}")
+            if error_code == 'NoSuchKey':
+                raise NotFoundException("File Not Found")
+            raise InternalServerErrorException("File Cannot Be Downloaded")
+
+        async def chunks():
+            try:
+                async for chunk in response['Body']:
+                    yield chunk
+            finally:
+                response['Body'].close()
+                await exit_stack.aclose()
+
+        return response, chunks()
+
+    async def get_presigned_url(
+            self,
+            key: str,
+            upload: bool = False,
+    ):
+        """
+        Generate a presigned URL to read or write a file directly from S3
+        :param key: The key of the file
+        :param upload: Generate a URL to upload the file (PUT) instead of downloading it (GET)
+        :return: The presigned URL
+        """
+        client_method = "put_object" if upload else "get_object"
+
+        async with self.client() as client:
+            return await client.generate_presigned_url(
+                client_method,
+                Params={"Bucket": self.s3_bucket, "Key": key},
+                ExpiresIn=self.s3_presigned_url_expiration,
+            )
+
     async def delete(
             self,
             key,
     ):
+        self.file_cache.remove(key)
+
         try:
-            session = get_session()
-
-            async with session.create_client(
-                    's3',
-                    region_name=self.s3_region,
-                    aws_secret_access_key=self.s3_secret_access_key,
-                    aws_access_key_id=self.s3_access_key_id,
-                    endpoint_url=self.s3_host
-            ) as client:
+            async with self.client() as client:
                 await client.delete_object(Bucket=self.s3_bucket, Key=key)
         except ClientError as e:
             self.logger.error(f"Error deleting file: {e}")
@@ -1,4 +1,5 @@
 from typing import List, Optional
+from sqlalchemy import Index, text
 from sqlmodel import Field, JSON, Column, SQLModel, Relationship
 from tasks.enums import TaskStatus
 from common.models import CoreModel
@@ -7,6 +8,10 @@ from services.models import Service
 from pydantic_settings import SettingsConfigDict
 
 
+# The tasks that are not finished, with their statuses as stored in the database
+IN_PROGRESS_CONDITION = "status IN ('PENDING', 'SCHEDULED', 'FETCHING', 'PROCESSING', 'SAVING')"
+
+
 class TaskBase(CoreModel):
     """
     Base class for Task
@@ -16,9 +21,9 @@ class TaskBase(CoreModel):
 
     data_in: Optional[List[str]] = Field(sa_column=Column(JSON), default=None)
     data_out: Optional[List[str]] = Field(sa_column=Column(JSON), default=None)
-    status: TaskStatus = TaskStatus.PENDING
-    service_id: UUID = Field(foreign_key="services.id")
-    pipeline_execution_id: Optional[UUID] = Field(default=None, foreign_key="pipeline_executions.id")
+    status: TaskStatus = Field(default=TaskStatus.PENDING, index=True)
+    service_id: UUID = Field(foreign_key="services.id", index=True)
+    pipeline_execution_id: Optional[UUID] = Field(default=None, foreign_key="pipeline_executions.id", index=True)
     # Soft reference to the pipeline step this task was created for. Lets the frontend
     # pair tasks to steps by id instead of by list position. Intentionally not a DB
     # foreign key: pipeline updates delete steps while only archiving their tasks.
@@ -33,6 +38,16 @@ class Task(TaskBase, table=True):
     """
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_updated_at", "updated_at"),
+        Index(
+            "ix_tasks_in_progress",
+            "service_id",
+            "status",
+            postgresql_where=text(IN_PROGRESS_CONDITION),
+            sqlite_where=text(IN_PROGRESS_CONDITION),
+        ),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     service: Service = Relationship(back_populates="tasks")
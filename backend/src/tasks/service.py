@@ -1,6 +1,6 @@
 import asyncio
 import json
-import re
+from collections import deque
 from fastapi import Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session, select, desc
@@ -8,14 +8,17 @@ from connection_manager.connection_manager import ConnectionManager, get_connect
 from connection_manager.models import Message, MessageType, MessageSubject, MessageToSend
 from database import get_session
 from common_code.logger.logger import Logger, get_logger
-from uuid import UUID
+from uuid import UUID, uuid4
 from http_client import HttpClient
 from storage.service import StorageService
 from tasks.models import Task, TaskUpdate, TaskStatus
 from common.exceptions import NotFoundException, CouldNotSendJsonException
+from common.functions import get_file_extension
 from pipeline_executions.service import PipelineExecutionsService
 from pipeline_executions.models import PipelineExecution, FileKeyReference
 from pipelines.models import Pipeline
+from pipelines.plan import get_execution_plan
+from pipeline_steps.conditions import get_compiled_condition
 from services.models import Service, ServiceTask
 from config import Settings, get_settings
 from httpx import HTTPError
@@ -132,20 +135,6 @@ def set_error_state(pipeline_execution: PipelineExecution, task_id: UUID):
             break
 
 
-def sanitize(condition: str):
-    """
-    Sanitize the condition
-    :param condition: The condition to sanitize
-    :return: The sanitized condition
-    """
-    # sanitize condition for eval
-    condition = condition.replace("==", "==")
-    condition = condition.replace("&&", "and")
-    condition = condition.replace("||", "or")
-    condition = condition.replace("!", "not ")
-    return condition
-
-
 class TasksService:
     def __init__(
             self,
@@ -197,6 +186,48 @@ class TasksService:
 
         return task
 
+    async def create_service_task(self, task: Task, service: Service):
+        """
+        Create the service task sent to a service to execute a task
+        In presigned URL mode, the service receives presigned URLs to read the task inputs and
+        to write its outputs instead of the S3 credentials
+        :param task: The task to execute
+        :param service: The service executing the task
+        :return: The service task
+        """
+        callback_url = f"{self.settings.host}/tasks/{task.id}"
+
+        if not self.settings.s3_presigned_urls:
+            return ServiceTask(
+                s3_access_key_id=self.settings.s3_access_key_id,
+                s3_secret_access_key=self.settings.s3_secret_access_key,
+                s3_region=self.settings.s3_region,
+                s3_host=self.settings.s3_host,
+                s3_bucket=self.settings.s3_bucket,
+                task=task,
+                callback_url=callback_url,
+            )
+
+        data_in_urls = [
+            await self.storage_service.get_presigned_url(file_key) for file_key in task.data_in or []
+        ]
+
+        # The output keys are allocated by the engine as the services cannot create them
+        data_out_keys = [
+            f"{uuid4()}{get_file_extension(data_out_field)}" for data_out_field in service.data_out_fields or []
+        ]
+        data_out_urls = [
+            await self.storage_service.get_presigned_url(file_key, upload=True) for file_key in data_out_keys
+        ]
+
+        return ServiceTask(
+            task=task,
+            callback_url=callback_url,
+            data_in_urls=data_in_urls,
+            data_out_keys=data_out_keys,
+            data_out_urls=data_out_urls,
+        )
+
     def find_one(self, task_id: UUID):
         """
         Find one task
@@ -364,15 +395,19 @@ class TasksService:
         # guaranteed to share a row order, which mislabels produced files and routes the
         # wrong data downstream. Fall back to positional pairing only for legacy tasks
         # created before the pipeline_step_id column existed.
-        steps_by_id = {step.id: step for step in pipeline.steps}
+        execution_plan = get_execution_plan(pipeline)
+        steps_by_id = execution_plan.steps_by_id
         if all(t.pipeline_step_id in steps_by_id for t in pipeline_execution.tasks):
             step_by_task_id = {t.id: steps_by_id[t.pipeline_step_id] for t in pipeline_execution.tasks}
         else:
             step_by_task_id = {
-                t.id: pipeline.steps[i]
+                t.id: steps_by_id[execution_plan.step_ids[i]]
                 for i, t in enumerate(pipeline_execution.tasks)
-                if i < len(pipeline.steps)
+                if i < len(execution_plan.step_ids)
             }
+        task_by_identifier = {
+            step_by_task_id[t.id].identifier: t for t in pipeline_execution.tasks if t.id in step_by_task_id
+        }
 
         current_pipeline_step = step_by_task_id.get(task.id)
         if current_pipeline_step is None:
@@ -411,26 +446,6 @@ class TasksService:
             self.logger.debug(f"Pipeline execution finished with id: {pipeline_execution.id}")
             return pipeline_execution
 
-        # Build completed identifiers set
-        completed_identifiers = {
-            step_by_task_id[t.id].identifier
-            for t in pipeline_execution.tasks
-            if t.status in final_states and t.id in step_by_task_id
-        }
-
-        # Find steps ready to start: task still SCHEDULED and all needs satisfied
-        ready_pairs = []  # (step, task)
-        for t in pipeline_execution.tasks:
-            step = step_by_task_id.get(t.id)
-            if step is None or t.status != TaskStatus.SCHEDULED:
-                continue
-            if all(n in completed_identifiers for n in (step.needs or [])):
-                ready_pairs.append((step, t))
-
-        # Collect coroutines to post ready tasks concurrently
-        post_coroutines = []
-        post_context = []  # tuples: (next_task, next_service)
-
         # Helper to get reference/file\_key from FileKeyReference or dict
         def get_ref(fkr) -> str | None:
             return getattr(fkr, "reference", None) if not isinstance(fkr, dict) else fkr.get("reference")
@@ -438,45 +453,57 @@ class TasksService:
         def get_key(fkr) -> str | None:
             return getattr(fkr, "file_key", None) if not isinstance(fkr, dict) else fkr.get("file_key")
 
-        for next_step, next_task in ready_pairs:
-            # Resolve input files by matching references already present in pipeline\_execution.files
-            task_files = []
-            for file_input in next_step.inputs or []:
-                for f in (pipeline_execution.files or []):
-                    if get_ref(f) == file_input:
-                        fk = get_key(f)
-                        if fk:
-                            task_files.append(fk)
-                        break
+        # Index the produced files by reference, keeping the first file of each reference
+        files_by_ref = {}
+        for f in (pipeline_execution.files or []):
+            files_by_ref.setdefault(get_ref(f), get_key(f))
+
+        def is_ready(step) -> bool:
+            step_task = task_by_identifier.get(step.identifier)
+            if step_task is None or step_task.status != TaskStatus.SCHEDULED:
+                return False
+            return all(
+                need in task_by_identifier and task_by_identifier[need].status in final_states
+                for need in step.needs
+            )
+
+        # Only the dependents of the step that just ended can become ready
+        candidate_steps = deque(execution_plan.get_dependents(current_pipeline_step.identifier))
+
+        # Collect coroutines to post ready tasks concurrently
+        post_coroutines = []
+        post_context = []  # tuples: (next_task, next_service)
+
+        while candidate_steps:
+            next_step = candidate_steps.popleft()
+            if not is_ready(next_step):
+                continue
+            next_task = task_by_identifier[next_step.identifier]
+
+            # Resolve input files from the references already present in pipeline\_execution.files
+            task_files = [files_by_ref[ref] for ref in next_step.inputs if files_by_ref.get(ref)]
 
             # Evaluate condition if present
             if next_step.condition:
-                condition = next_step.condition
+                compiled_condition = get_compiled_condition(next_step)
                 files_mapping = {}
-                for f in (pipeline_execution.files or []):
-                    fk = get_key(f)
-                    ref = get_ref(f)
-                    if not fk or not ref or fk not in task_files:
+                for ref in compiled_condition.aliases:
+                    fk = files_by_ref.get(ref)
+                    if not fk or ref not in next_step.inputs:
                         continue
-                    alias = re.sub(r"[-.]", "_", ref)
                     ext = fk.rsplit(".", 1)[-1].lower() if "." in fk else ""
+                    if ext not in ("txt", "json"):
+                        self.logger.debug(f"Condition input {fk} ignored (unsupported ext \'{ext}\')")
+                        continue
                     try:
-                        content_bytes = await self.storage_service.get_file_as_bytes(fk)
-                        if ext == "txt":
-                            files_mapping[alias] = content_bytes.decode("utf-8")
-                            condition = condition.replace(ref, alias)
-                        elif ext == "json":
-                            files_mapping[alias] = json.loads(content_bytes.decode("utf-8"))
-                            condition = condition.replace(ref, alias)
-                        else:
-                            self.logger.debug(f"Condition input {fk} ignored (unsupported ext \'{ext}\')")
+                        files_mapping[ref] = await self.storage_service.get_decoded_file(fk)
                     except Exception as e:
                         self.logger.error(f"Could not download file {fk} from storage: {e}")
 
-                condition_clean = sanitize(condition)
-                if not eval(condition_clean, {}, files_mapping):
+                if not compiled_condition.evaluate(files_mapping):
                     self.logger.info(
-                        f"Condition {condition_clean} evaluated to False for step {next_step.identifier}. Skipping."
+                        f"Condition {compiled_condition.source} evaluated to False for step {next_step.identifier}. "
+                        f"Skipping."
                     )
                     next_task.status = TaskStatus.SKIPPED
                     next_task.data_in = task_files
@@ -488,6 +515,9 @@ class TasksService:
                     self.logger.debug(f"Sending task {next_task} to client")
                     message = create_message(next_task)
                     await self.send_message(message, pipeline_execution, next_task, general_status=TaskStatus.FINISHED)
+
+                    # The dependents of the skipped step can now be ready
+                    candidate_steps.extend(execution_plan.get_dependents(next_step.identifier))
                     continue
 
             # Prepare task to run
@@ -500,15 +530,7 @@ class TasksService:
 
             # Prepare service task payload and request
             next_service = self.session.get(Service, next_step.service_id)
-            service_task = ServiceTask(
-                s3_access_key_id=self.settings.s3_access_key_id,
-                s3_secret_access_key=self.settings.s3_secret_access_key,
-                s3_region=self.settings.s3_region,
-                s3_host=self.settings.s3_host,
-                s3_bucket=self.settings.s3_bucket,
-                task=next_task,
-                callback_url=f"{self.settings.host}/tasks/{next_task.id}"
-            )
+            service_task = await self.create_service_task(next_task, next_service)
 
             post_coroutines.append(
                 self.http_client.post(f"{next_service.url}/compute", json=jsonable_encoder(service_task)))
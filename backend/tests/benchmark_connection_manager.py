@@ -0,0 +1,69 @@
+"""
+Benchmark of the connection manager lookups with many open websockets.
+
+Compares the linear scan of the connections with the indexed lookups:
+
+    PYTHONPATH=src python tests/benchmark_connection_manager.py
+"""
+import asyncio
+import time
+from uuid import uuid4
+from connection_manager.connection_manager import ConnectionManager
+
+CONNECTIONS = 10_000
+LOOKUPS = 10_000
+# The linear scan is too slow to run as many lookups
+SCAN_LOOKUPS = 100
+
+
+class BenchmarkWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        pass
+
+
+def scan_by_linked_id(connections, linked_id):
+    for connection in connections:
+        if str(connection.linked_id) == str(linked_id):
+            return connection
+    return None
+
+
+async def main():
+    connection_manager = ConnectionManager()
+    websockets = [BenchmarkWebSocket() for _ in range(CONNECTIONS)]
+    linked_ids = [uuid4() for _ in range(CONNECTIONS)]
+
+    for websocket, linked_id in zip(websockets, linked_ids):
+        await connection_manager.connect(websocket)
+        connection_manager.set_linked_id(websocket, linked_id)
+
+    connections = list(connection_manager.active_connections.values())
+    # Look up the last linked ids, the worst case of the linear scan
+    targets = linked_ids[-100:] * (LOOKUPS // 100)
+
+    start = time.perf_counter()
+    for linked_id in targets[:SCAN_LOOKUPS]:
+        scan_by_linked_id(connections, linked_id)
+    scan_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for linked_id in targets:
+        connection_manager.find_by_linked_id(linked_id)
+    indexed_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for websocket in websockets[:LOOKUPS]:
+        connection_manager.find_by_websocket(websocket)
+    websocket_duration = time.perf_counter() - start
+
+    print(f"{CONNECTIONS} connections")  # noqa: T201
+    print(f"Linear scan by linked_id: {scan_duration * 1e6 / SCAN_LOOKUPS:.2f} us/lookup")  # noqa: T201
+    print(f"Indexed by linked_id:     {indexed_duration * 1e6 / LOOKUPS:.2f} us/lookup")  # noqa: T201
+    print(f"Indexed by websocket:     {websocket_duration * 1e6 / LOOKUPS:.2f} us/lookup")  # noqa: T201
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
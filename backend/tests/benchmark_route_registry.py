@@ -0,0 +1,90 @@
+"""
+Benchmark of the dynamic routes of the services with a linear scan of the app routes versus the route registry.
+
+Registers 500 service routes (startup), then runs availability sweeps that check every route and toggle a tenth
+of the services. The OpenAPI schema is requested after each sweep and is not part of the sweep duration:
+
+    PYTHONPATH=src python tests/benchmark_route_registry.py
+"""
+import time
+from fastapi import FastAPI, UploadFile
+from route_registry import get_route_registry
+
+SERVICES = 500
+SWEEPS = 10
+
+
+async def handler(image: UploadFile):
+    return {}
+
+
+def scan_add(app: FastAPI, slug: str):
+    for route in app.routes:
+        if route.path == f"/{slug}":
+            return
+    app.add_api_route(f"/{slug}", handler, methods=["POST"])
+    app.openapi_schema = None
+
+
+def scan_remove(app: FastAPI, slug: str):
+    for route in app.routes:
+        if route.path == f"/{slug}":
+            app.routes.remove(route)
+            app.openapi_schema = None
+            break
+
+
+def registry_add(app: FastAPI, slug: str):
+    route_registry = get_route_registry(app)
+    if slug not in route_registry:
+        route_registry.add(slug, handler, methods=["POST"])
+
+
+def registry_remove(app: FastAPI, slug: str):
+    get_route_registry(app).remove(slug)
+
+
+def run(app: FastAPI, add, remove):
+    slugs = [f"service-{index}" for index in range(SERVICES)]
+
+    start = time.perf_counter()
+    for slug in slugs:
+        add(app, slug)
+    startup_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.openapi()
+    openapi_duration = time.perf_counter() - start
+
+    # Sweep where every service stays available
+    start = time.perf_counter()
+    for _ in range(SWEEPS):
+        for slug in slugs:
+            add(app, slug)
+    steady_sweep_duration = (time.perf_counter() - start) / SWEEPS
+
+    sweep_duration = 0.0
+    for sweep in range(SWEEPS):
+        start = time.perf_counter()
+        for index, slug in enumerate(slugs):
+            if index % 10 == sweep:
+                remove(app, slug)
+        for slug in slugs:
+            add(app, slug)
+        sweep_duration += time.perf_counter() - start
+        app.openapi()
+
+    return startup_duration, steady_sweep_duration, sweep_duration / SWEEPS, openapi_duration
+
+
+if __name__ == "__main__":
+    print(f"{SERVICES} services")  # noqa: T201
+    for name, add, remove in [
+        ("Linear scan", scan_add, scan_remove),
+        ("Registry   ", registry_add, registry_remove),
+    ]:
+        startup, steady_sweep, sweep, openapi = run(FastAPI(), add, remove)
+        print(  # noqa: T201
+            f"{name}: startup {startup:.3f}s, steady sweep {steady_sweep * 1000:.2f}ms, "
+            f"sweep with 10% toggles {sweep * 1000:.2f}ms, schema {openapi:.3f}s"
+        )
@@ -0,0 +1,72 @@
+"""
+Benchmark of the services listing with its total count over 10k services.
+
+Compares counting by loading every matching service, a COUNT(*) query next to the page query, and the page with
+a window count in a single query. The window count sorts all the matching rows before the limit is applied:
+
+    PYTHONPATH=src python tests/benchmark_services_count.py
+"""
+import time
+from sqlmodel import Session, SQLModel, create_engine, select, col, func
+from sqlmodel.pool import StaticPool
+from common.queries import find_page_with_total_count
+from services.models import Service
+
+SERVICES = 10_000
+LIMIT = 20
+REPETITIONS = 20
+
+
+def materialize(session: Session, statement):
+    services = session.exec(statement.offset(0).limit(LIMIT)).all()
+    return len([service for service in session.exec(statement)]), services
+
+
+def count(session: Session, statement):
+    return find_page_with_total_count(session, statement, 0, LIMIT)
+
+
+def window(session: Session, statement):
+    rows = session.execute(statement.add_columns(func.count().over()).offset(0).limit(LIMIT)).all()
+    return rows[0][1], [row[0] for row in rows]
+
+
+def run(engine, statement, find) -> float:
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        # A new session per request, as in the API
+        with Session(engine) as session:
+            total_count, services = find(session, statement)
+    duration = (time.perf_counter() - start) / REPETITIONS
+
+    assert total_count == SERVICES // 2 and len(services) == LIMIT
+
+    return duration
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all([
+            Service(
+                name=f"service-{index}", slug=f"service-{index}", summary="summary",
+                description="even" if index % 2 == 0 else "odd", url=f"http://service-{index}",
+                data_in_fields=[{"name": "image", "type": ["image/jpeg", "image/png"]}],
+                data_out_fields=[{"name": "result", "type": ["application/json"]}],
+            )
+            for index in range(SERVICES)
+        ])
+        session.commit()
+
+    # Half of the services match the search
+    statement = select(Service).where(col(Service.description).ilike("%even%")).order_by("name")
+
+    for name, find in [("materialize", materialize), ("count(*)", count), ("window", window)]:
+        duration = run(engine, statement, find)
+        print(f"{name:<12} {duration * 1000:8.2f} ms per listing")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of the storage operations with a client per call versus the shared client.
+
+Starts a MinIO container and runs the same upload/download/delete cycle with both modes:
+
+    PYTHONPATH=src python tests/benchmark_storage_client.py
+"""
+import asyncio
+import io
+import time
+from fastapi import UploadFile
+from testcontainers.minio import MinioContainer
+from common_code.logger.logger import get_logger
+from config import get_settings
+from storage.service import StorageService
+
+OPERATIONS = 200
+
+
+async def run_cycles(storage_service: StorageService):
+    start = time.perf_counter()
+
+    for _ in range(OPERATIONS):
+        key = await storage_service.upload(UploadFile(filename="bench.txt", file=io.BytesIO(b"benchmark")))
+        await storage_service.get_file_as_bytes(key)
+        await storage_service.delete(key)
+
+    # Three storage operations per cycle
+    return OPERATIONS * 3 / (time.perf_counter() - start)
+
+
+async def main(storage_service: StorageService):
+    per_call_ops = await run_cycles(storage_service)
+
+    await storage_service.open_client()
+    try:
+        shared_ops = await run_cycles(storage_service)
+    finally:
+        await storage_service.close_client()
+
+    print(f"Client per call: {per_call_ops:.1f} ops/sec")  # noqa: T201
+    print(f"Shared client:   {shared_ops:.1f} ops/sec")  # noqa: T201
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+
+    with MinioContainer(access_key=settings.s3_access_key_id, secret_key=settings.s3_secret_access_key) as minio:
+        minio.get_client().make_bucket(settings.s3_bucket)
+        settings.s3_host = f"http://localhost:{minio.get_exposed_port(9000)}"
+
+        asyncio.run(main(StorageService(logger=get_logger(settings), settings=settings)))
@@ -0,0 +1,71 @@
+"""
+Benchmark of the download latency with an existence check before the download versus a single request.
+
+Starts a MinIO container and downloads the same file with both paths:
+
+    PYTHONPATH=src python tests/benchmark_storage_download.py
+"""
+import asyncio
+import io
+import statistics
+import time
+from fastapi import UploadFile
+from testcontainers.minio import MinioContainer
+from common_code.logger.logger import get_logger
+from config import get_settings
+from storage.service import StorageService
+
+DOWNLOADS = 500
+
+
+async def download_with_check(storage_service: StorageService, key: str):
+    # Previous download path: ACL request to check the file, then a separate GET
+    async with storage_service.client() as client:
+        await client.get_object_acl(Bucket=storage_service.s3_bucket, Key=key)
+        response = await client.get_object(Bucket=storage_service.s3_bucket, Key=key)
+        async for _ in response['Body']:
+            pass
+
+
+async def download_single_request(storage_service: StorageService, key: str):
+    _, chunks = await storage_service.open_file(key)
+    async for _ in chunks:
+        pass
+
+
+async def measure(download, storage_service: StorageService, key: str):
+    latencies = []
+
+    for _ in range(DOWNLOADS):
+        start = time.perf_counter()
+        await download(storage_service, key)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(latencies), statistics.quantiles(latencies, n=100)[94]
+
+
+async def main(storage_service: StorageService):
+    await storage_service.open_client()
+    try:
+        key = await storage_service.upload(UploadFile(filename="bench.txt", file=io.BytesIO(b"benchmark" * 1024)))
+
+        for name, download in [
+            ("Check + download", download_with_check),
+            ("Single request", download_single_request),
+        ]:
+            p50, p95 = await measure(download, storage_service, key)
+            print(f"{name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms")  # noqa: T201
+
+        await storage_service.delete(key)
+    finally:
+        await storage_service.close_client()
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+
+    with MinioContainer(access_key=settings.s3_access_key_id, secret_key=settings.s3_secret_access_key) as minio:
+        minio.get_client().make_bucket(settings.s3_bucket)
+        settings.s3_host = f"http://localhost:{minio.get_exposed_port(9000)}"
+
+        asyncio.run(main(StorageService(logger=get_logger(settings), settings=settings)))
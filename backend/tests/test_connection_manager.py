@@ -0,0 +1,164 @@
+import pytest
+import time
+from uuid import uuid4
+from common.exceptions import CouldNotSendJsonException
+from connection_manager.connection_manager import ConnectionManager, MessageQueue
+from connection_manager.models import Message, MessageSubject, MessageToSend, MessageType
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        pass
+
+
+def create_test_message():
+    return Message(message={"text": "test", "data": {}}, type=MessageType.INFO, subject=MessageSubject.EXECUTION)
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_lookups():
+    connection_manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    linked_id = uuid4()
+
+    await connection_manager.connect(websocket)
+
+    assert connection_manager.find_by_websocket(websocket).websocket is websocket
+    assert connection_manager.find_by_linked_id(linked_id) is None
+
+    connection = connection_manager.set_linked_id(websocket, str(linked_id))
+
+    assert connection_manager.find_by_linked_id(linked_id) is connection
+    assert connection_manager.find_by_linked_id(str(linked_id)) is connection
+
+    other_linked_id = uuid4()
+    connection_manager.set_linked_id(websocket, other_linked_id)
+
+    assert connection_manager.find_by_linked_id(linked_id) is None
+    assert connection_manager.find_by_linked_id(other_linked_id) is connection
+
+    connection_manager.disconnect(websocket)
+
+    assert connection_manager.find_by_websocket(websocket) is None
+    assert connection_manager.find_by_linked_id(other_linked_id) is None
+    assert connection_manager.connections_by_linked_id == {}
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_several_websockets_per_linked_id():
+    connection_manager = ConnectionManager()
+    first_websocket = FakeWebSocket()
+    second_websocket = FakeWebSocket()
+    linked_id = uuid4()
+
+    for websocket in (first_websocket, second_websocket):
+        await connection_manager.connect(websocket)
+        connection_manager.set_linked_id(websocket, linked_id)
+        websocket.sent.clear()
+
+    assert len(connection_manager.find_all_by_linked_id(linked_id)) == 2
+
+    await connection_manager.send_json(create_test_message(), linked_id)
+
+    assert len(first_websocket.sent) == 1
+    assert len(second_websocket.sent) == 1
+
+    connection_manager.disconnect(first_websocket)
+    await connection_manager.send_json(create_test_message(), linked_id)
+
+    assert len(first_websocket.sent) == 1
+    assert len(second_websocket.sent) == 2
+
+    connection_manager.disconnect(second_websocket)
+
+    with pytest.raises(CouldNotSendJsonException):
+        await connection_manager.send_json(create_test_message(), linked_id)
+
+
+def create_message_to_send(linked_id):
+    return MessageToSend(message=create_test_message(), linked_id=linked_id)
+
+
+def test_message_queue_is_bounded():
+    message_queue = MessageQueue(max_size=3, max_size_per_linked_id=2)
+    first_linked_id = uuid4()
+    second_linked_id = uuid4()
+
+    for _ in range(3):
+        message_queue.add(create_message_to_send(first_linked_id))
+
+    assert len(message_queue.queues[str(first_linked_id)]) == 2
+
+    message_queue.add(create_message_to_send(second_linked_id))
+    message_queue.add(create_message_to_send(second_linked_id))
+
+    stats = message_queue.stats()
+    assert stats.depth == 3
+    assert stats.linked_ids == 2
+    assert stats.dropped_full == 2
+
+
+def test_message_queue_expires_messages():
+    message_queue = MessageQueue(ttl=10)
+    linked_id = uuid4()
+
+    message_queue.add(create_message_to_send(linked_id))
+    message_queue.remove_expired(time.monotonic() + 20)
+
+    assert message_queue.queues == {}
+    assert message_queue.stats().depth == 0
+    assert message_queue.stats().dropped_expired == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_sends_queued_messages_when_linked():
+    connection_manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    linked_id = uuid4()
+
+    connection_manager.message_queue.add(create_message_to_send(linked_id))
+    connection_manager.message_queue.add(create_message_to_send(linked_id))
+
+    await connection_manager.connect(websocket)
+    connection_manager.set_linked_id(websocket, linked_id)
+    websocket.sent.clear()
+    await connection_manager.send_queued_messages(linked_id)
+
+    assert len(websocket.sent) == 2
+    assert connection_manager.message_queue.stats().depth == 0
+    assert connection_manager.message_queue.stats().delivered == 2
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_retries_queued_messages_with_backoff():
+    connection_manager = ConnectionManager(message_queue=MessageQueue(max_attempts=2, retry_backoff=60))
+    linked_id = uuid4()
+
+    connection_manager.message_queue.add(create_message_to_send(linked_id))
+    connection_manager.message_queue.add(create_message_to_send(linked_id))
+    await connection_manager.send_queued_messages(linked_id)
+
+    # The client is not linked, the messages wait for the backoff delay
+    assert connection_manager.message_queue.stats().depth == 2
+    assert connection_manager.message_queue.take_due(linked_id, time.monotonic()) == []
+
+    queued_messages = connection_manager.message_queue.take_due(linked_id, time.monotonic() + 60)
+    assert queued_messages[0].attempts == 1
+
+    connection_manager.message_queue.retry(queued_messages, time.monotonic())
+
+    stats = connection_manager.message_queue.stats()
+    assert stats.depth == 1
+    assert stats.dropped_attempts == 1
@@ -0,0 +1,149 @@
+import pytest
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from testcontainers.postgres import PostgresContainer
+
+BACKEND_PATH = Path(__file__).resolve().parent.parent
+
+SERVICES = 500
+PIPELINES = 2000
+STEPS_PER_PIPELINE = 5
+EXECUTIONS_PER_PIPELINE = 10
+TASKS_PER_EXECUTION = 5
+
+SEED_STATEMENTS = [
+    f"""
+    INSERT INTO services (id, name, slug, summary, status, created_at, updated_at)
+    SELECT gen_random_uuid(), 'service-' || i, 'service-' || i, 'summary', 'AVAILABLE', now(), now()
+    FROM generate_series(1, {SERVICES}) AS i
+    """,
+    f"""
+    INSERT INTO pipelines (id, name, slug, summary, status, created_at, updated_at)
+    SELECT gen_random_uuid(), 'pipeline-' || i, 'pipeline-' || i, 'summary', 'AVAILABLE', now(), now()
+    FROM generate_series(1, {PIPELINES}) AS i
+    """,
+    f"""
+    INSERT INTO pipeline_steps (id, identifier, inputs, pipeline_id, service_id, created_at, updated_at)
+    SELECT gen_random_uuid(), 'step', '[]', pipelines.ids[1 + i % {PIPELINES}], services.ids[1 + i % {SERVICES}],
+           now(), now()
+    FROM generate_series(1, {PIPELINES * STEPS_PER_PIPELINE}) AS i,
+         (SELECT array_agg(id) AS ids FROM pipelines) AS pipelines,
+         (SELECT array_agg(id) AS ids FROM services) AS services
+    """,
+    f"""
+    INSERT INTO pipeline_executions (id, pipeline_id, created_at, updated_at)
+    SELECT gen_random_uuid(), pipelines.ids[1 + i % {PIPELINES}], now(), now()
+    FROM generate_series(1, {PIPELINES * EXECUTIONS_PER_PIPELINE}) AS i,
+         (SELECT array_agg(id) AS ids FROM pipelines) AS pipelines
+    """,
+    f"""
+    INSERT INTO tasks (id, status, service_id, pipeline_execution_id, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           CASE WHEN i % 97 = 0 THEN 'PROCESSING' WHEN i % 997 = 0 THEN 'ERROR' ELSE 'FINISHED' END::taskstatus,
+           services.ids[1 + i % {SERVICES}], executions.ids[1 + i % {PIPELINES * EXECUTIONS_PER_PIPELINE}],
+           now() - i * interval '1 second', now() - i * interval '1 second'
+    FROM generate_series(1, {PIPELINES * EXECUTIONS_PER_PIPELINE * TASKS_PER_EXECUTION}) AS i,
+         (SELECT array_agg(id) AS ids FROM services) AS services,
+         (SELECT array_agg(id) AS ids FROM pipeline_executions) AS executions
+    """,
+    "ANALYZE",
+]
+
+
+def get_used_indexes(connection, query: str, **params) -> set:
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params).scalar_one()
+
+    indexes = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+
+    return indexes
+
+
+@pytest.fixture(scope="module", name="connection")
+def connection_fixture():
+    with PostgresContainer() as postgres, pytest.MonkeyPatch.context() as monkeypatch:
+        database_url = postgres.get_connection_url()
+        # The migrations use the database url of the environment
+        monkeypatch.setenv("DATABASE_URL", database_url)
+
+        config = Config(str(BACKEND_PATH / "alembic.ini"))
+        config.set_main_option("script_location", str(BACKEND_PATH / "alembic"))
+        command.upgrade(config, "head")
+
+        engine = create_engine(database_url)
+        with engine.begin() as connection:
+            for statement in SEED_STATEMENTS:
+                connection.execute(text(statement))
+
+        with engine.connect() as connection:
+            yield connection
+
+        engine.dispose()
+
+
+def get_any_id(connection, table: str):
+    return str(connection.execute(text(f"SELECT id FROM {table} LIMIT 1")).scalar_one())
+
+
+def test_tasks_of_pipeline_execution_use_index(connection):
+    pipeline_execution_id = get_any_id(connection, "pipeline_executions")
+
+    assert "ix_tasks_pipeline_execution_id" in get_used_indexes(
+        connection, "SELECT * FROM tasks WHERE pipeline_execution_id = :id", id=pipeline_execution_id
+    )
+
+
+def test_tasks_of_service_use_index(connection):
+    service_id = get_any_id(connection, "services")
+
+    assert "ix_tasks_service_id" in get_used_indexes(
+        connection, "SELECT * FROM tasks WHERE service_id = :id", id=service_id
+    )
+
+
+def test_tasks_by_status_use_index(connection):
+    assert "ix_tasks_status" in get_used_indexes(connection, "SELECT * FROM tasks WHERE status = 'ERROR'")
+
+
+def test_tasks_in_progress_use_partial_index(connection):
+    service_id = get_any_id(connection, "services")
+
+    assert "ix_tasks_in_progress" in get_used_indexes(
+        connection,
+        "SELECT id FROM tasks WHERE service_id = :id "
+        "AND status IN ('PENDING', 'SCHEDULED', 'FETCHING', 'PROCESSING', 'SAVING')",
+        id=service_id,
+    )
+
+
+def test_latest_tasks_use_index(connection):
+    assert "ix_tasks_updated_at" in get_used_indexes(
+        connection, "SELECT * FROM tasks ORDER BY updated_at DESC LIMIT 100"
+    )
+
+
+def test_pipeline_steps_use_indexes(connection):
+    pipeline_id = get_any_id(connection, "pipelines")
+    service_id = get_any_id(connection, "services")
+
+    assert "ix_pipeline_steps_pipeline_id" in get_used_indexes(
+        connection, "SELECT * FROM pipeline_steps WHERE pipeline_id = :id", id=pipeline_id
+    )
+    assert "ix_pipeline_steps_service_id" in get_used_indexes(
+        connection, "SELECT * FROM pipeline_steps WHERE service_id = :id", id=service_id
+    )
+
+
+def test_pipeline_executions_of_pipeline_use_index(connection):
+    pipeline_id = get_any_id(connection, "pipelines")
+
+    assert "ix_pipeline_executions_pipeline_id" in get_used_indexes(
+        connection, "SELECT * FROM pipeline_executions WHERE pipeline_id = :id", id=pipeline_id
+    )
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from uuid import uuid4
+from pipelines.plan import get_execution_plan, invalidate_execution_plan
+
+
+def create_step(identifier, needs, inputs):
+    return SimpleNamespace(
+        id=uuid4(), identifier=identifier, service_id=uuid4(), needs=needs, inputs=inputs, condition=None,
+    )
+
+
+def create_pipeline():
+    return SimpleNamespace(id=uuid4(), steps=[
+        create_step("image-blur", ["face-detection"], ["pipeline.image", "face-detection.areas"]),
+        create_step("face-detection", [], ["pipeline.image"]),
+        create_step("image-crop", ["face-detection"], ["pipeline.image", "face-detection.areas"]),
+        create_step("merge", ["image-blur", "image-crop"], ["image-blur.image", "image-crop.image"]),
+    ])
+
+
+def test_execution_plan():
+    pipeline = create_pipeline()
+
+    execution_plan = get_execution_plan(pipeline)
+
+    assert execution_plan.step_ids == tuple(step.id for step in pipeline.steps)
+    assert execution_plan.order[0] == "face-detection"
+    assert execution_plan.order[-1] == "merge"
+    assert [step.identifier for step in execution_plan.get_dependents("face-detection")] == [
+        "image-blur", "image-crop",
+    ]
+    assert [step.identifier for step in execution_plan.get_dependents("image-crop")] == ["merge"]
+    assert execution_plan.get_dependents("merge") == []
+    assert execution_plan.steps_by_identifier["merge"].inputs == ("image-blur.image", "image-crop.image")
+
+
+def test_execution_plan_is_cached():
+    pipeline = create_pipeline()
+
+    execution_plan = get_execution_plan(pipeline)
+
+    assert get_execution_plan(pipeline) is execution_plan
+
+    invalidate_execution_plan(pipeline.id)
+
+    assert get_execution_plan(pipeline) is not execution_plan
+
+    execution_plan = get_execution_plan(pipeline)
+    pipeline.steps = pipeline.steps[:2]
+
+    assert get_execution_plan(pipeline) is not execution_plan
+    assert len(get_execution_plan(pipeline).steps_by_id) == 2
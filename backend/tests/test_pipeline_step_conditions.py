@@ -0,0 +1,74 @@
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from common.exceptions import InvalidConditionException
+from pipeline_steps.conditions import (
+    CompiledCondition,
+    get_compiled_condition,
+    invalidate_compiled_conditions,
+)
+
+
+def test_compiled_condition_with_references():
+    compiled_condition = CompiledCondition(
+        "len(face-detection.result['areas']) > 0",
+        ["pipeline.image", "face-detection.result"],
+    )
+
+    assert compiled_condition.aliases == {"face-detection.result": "face_detection_result"}
+    assert compiled_condition.evaluate({"face-detection.result": {"areas": [[165, 64, 382, 383]]}})
+    assert not compiled_condition.evaluate({"face-detection.result": {"areas": []}})
+
+
+def test_compiled_condition_operators():
+    compiled_condition = CompiledCondition(
+        "pipeline.text != 'a || b' && !(pipeline.text == 'c')",
+        ["pipeline.text"],
+    )
+
+    assert compiled_condition.evaluate({"pipeline.text": "d"})
+    assert not compiled_condition.evaluate({"pipeline.text": "a || b"})
+    assert not compiled_condition.evaluate({"pipeline.text": "c"})
+    assert CompiledCondition("1 == 0 || 1 == 1", []).evaluate({})
+
+
+def test_compiled_condition_does_not_replace_longer_references():
+    compiled_condition = CompiledCondition("step.result-2 == 'b'", ["step.result", "step.result-2"])
+
+    assert compiled_condition.aliases == {"step.result-2": "step_result_2"}
+    assert compiled_condition.evaluate({"step.result": "a", "step.result-2": "b"})
+
+
+@pytest.mark.parametrize("condition", [
+    "__import__('os').system('ls')",
+    "pipeline.text.__class__",
+    "open('/etc/passwd')",
+    "unknown == 1",
+    "lambda: 1",
+    "1 ==",
+])
+def test_compiled_condition_invalid(condition):
+    with pytest.raises(InvalidConditionException):
+        CompiledCondition(condition, ["pipeline.text"])
+
+
+def test_get_compiled_condition_is_cached():
+    pipeline_step = SimpleNamespace(
+        id=uuid4(),
+        inputs=["pipeline.text"],
+        condition="pipeline.text == 'a'",
+    )
+
+    compiled_condition = get_compiled_condition(pipeline_step)
+
+    assert get_compiled_condition(pipeline_step) is compiled_condition
+
+    pipeline_step.condition = "pipeline.text == 'b'"
+
+    assert get_compiled_condition(pipeline_step) is not compiled_condition
+    assert get_compiled_condition(pipeline_step).evaluate({"pipeline.text": "b"})
+
+    compiled_condition = get_compiled_condition(pipeline_step)
+    invalidate_compiled_conditions([pipeline_step.id])
+
+    assert get_compiled_condition(pipeline_step) is not compiled_condition
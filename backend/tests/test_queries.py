@@ -0,0 +1,131 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID, uuid4
+from sqlmodel import Column, Field, JSON, Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+from common.exceptions import InvalidCursorException
+from common.queries import count_rows, find_page_after, find_page_with_total_count
+
+
+class QueryItem(SQLModel, table=True):
+    __tablename__ = "query_items"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+
+
+def create_session(items: int) -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    QueryItem.__table__.create(engine)
+
+    session = Session(engine)
+    session.add_all([QueryItem(name=f"item-{index:02d}") for index in range(items)])
+    session.commit()
+
+    return session
+
+
+def test_count_rows():
+    with create_session(10) as session:
+        statement = select(QueryItem).where(QueryItem.id > 3).order_by(QueryItem.name)
+
+        assert count_rows(session, statement) == 7
+        assert count_rows(session, statement.where(QueryItem.id > 100)) == 0
+
+
+def test_find_page_with_total_count():
+    with create_session(10) as session:
+        statement = select(QueryItem).order_by(QueryItem.name)
+
+        total_count, items = find_page_with_total_count(session, statement, 2, 3)
+
+        assert total_count == 10
+        assert [item.name for item in items] == ["item-02", "item-03", "item-04"]
+
+
+def test_find_page_with_total_count_of_the_last_page():
+    with create_session(10) as session:
+        statement = select(QueryItem).order_by(QueryItem.name)
+
+        total_count, items = find_page_with_total_count(session, statement, 8, 3)
+
+        assert total_count == 10
+        assert [item.name for item in items] == ["item-08", "item-09"]
+        assert find_page_with_total_count(session, statement, 20, 3) == (10, [])
+        assert find_page_with_total_count(session, statement.where(QueryItem.id > 100), 0, 3) == (0, [])
+
+
+class CursorItem(SQLModel, table=True):
+    __tablename__ = "cursor_items"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    rank: Optional[int] = None
+    created_at: datetime
+    data: Optional[dict] = Field(sa_column=Column(JSON), default=None)
+
+
+def create_cursor_session() -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    CursorItem.__table__.create(engine)
+
+    session = Session(engine)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Some ranks are repeated and some are missing
+    session.add_all([
+        CursorItem(rank=None if index % 5 == 0 else index % 7, created_at=start + timedelta(minutes=index))
+        for index in range(23)
+    ])
+    session.commit()
+
+    return session
+
+
+def find_all_pages(session: Session, limit: int, order_by: str, order: str) -> List[CursorItem]:
+    items, after = [], None
+    while True:
+        page, after = find_page_after(
+            session, select(CursorItem), CursorItem, after, limit, None if after else order_by,
+            None if after else order, "created_at", "desc",
+        )
+        items += page
+        if after is None:
+            return items
+        assert len(page) == limit
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 4, 23, 50])
+def test_find_page_after(order, limit):
+    with create_cursor_session() as session:
+        all_items = session.exec(select(CursorItem)).all()
+
+        items = find_all_pages(session, limit, "rank", order)
+
+        ranked = sorted([item for item in all_items if item.rank is not None], key=lambda item: (item.rank, item.id))
+        unranked = sorted([item for item in all_items if item.rank is None], key=lambda item: item.id)
+        if order == "desc":
+            ranked, unranked = ranked[::-1], unranked[::-1]
+        assert [item.id for item in items] == [item.id for item in ranked + unranked]
+
+
+def test_find_page_after_with_default_order():
+    with create_cursor_session() as session:
+        items = find_all_pages(session, 5, None, None)
+
+        assert [item.created_at for item in items] == sorted([item.created_at for item in items], reverse=True)
+        assert len(items) == 23
+
+
+def test_find_page_after_with_invalid_cursor():
+    with create_cursor_session() as session:
+        _, after = find_page_after(session, select(CursorItem), CursorItem, None, 5, "rank", "asc", "rank", "asc")
+
+        with pytest.raises(InvalidCursorException):
+            find_page_after(session, select(CursorItem), CursorItem, after, 5, "created_at", None, "rank", "asc")
+        with pytest.raises(InvalidCursorException):
+            find_page_after(session, select(CursorItem), CursorItem, "not-a-cursor", 5, None, None, "rank", "asc")
+        with pytest.raises(InvalidCursorException):
+            find_page_after(session, select(CursorItem), CursorItem, None, 5, "data", None, "rank", "asc")
+        with pytest.raises(InvalidCursorException):
+            find_page_after(session, select(CursorItem), CursorItem, None, 5, "unknown", None, "rank", "asc")
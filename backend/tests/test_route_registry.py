@@ -0,0 +1,80 @@
+import time
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+from route_registry import RouteRegistry, get_route_registry
+
+
+async def handler(file: UploadFile):
+    return {"filename": file.filename}
+
+
+def test_route_registry_add_and_remove():
+    app = FastAPI()
+    route_registry = get_route_registry(app)
+
+    assert get_route_registry(app) is route_registry
+    assert "image-blur" not in route_registry
+
+    route = route_registry.add("image-blur", handler, methods=["POST"])
+
+    assert "image-blur" in route_registry
+    assert route.path == "/image-blur"
+    assert route in app.routes
+
+    assert route_registry.remove("image-blur")
+    assert not route_registry.remove("image-blur")
+    assert route not in app.routes
+
+
+def test_route_registry_does_not_remove_static_routes():
+    app = FastAPI()
+
+    @app.get("/stats")
+    def stats():
+        return {}
+
+    assert not get_route_registry(app).remove("stats")
+    assert "/stats" in {route.path for route in app.routes}
+
+
+def test_route_registry_serves_last_schema_until_the_new_one_is_ready():
+    app = FastAPI()
+    route_registry = RouteRegistry(app, schema_generation_delay=0)
+
+    for index in range(10):
+        route_registry.add(f"service-{index}", handler, methods=["POST"])
+
+    with TestClient(app) as client:
+        assert "/service-9" in client.get("/openapi.json").json()["paths"]
+        client.get("/openapi.json")
+
+        assert route_registry.schema_generations == 1
+
+        route_registry.remove("service-9")
+
+        # The previous schema is served while the new one is generated in the background
+        assert "/service-9" in client.get("/openapi.json").json()["paths"]
+
+        for _ in range(100):
+            if route_registry.schema_version == route_registry.version:
+                break
+            time.sleep(0.05)
+
+        assert "/service-9" not in client.get("/openapi.json").json()["paths"]
+        assert route_registry.schema_generations == 2
+
+
+def test_route_registry_openapi_etag():
+    app = FastAPI()
+    route_registry = RouteRegistry(app)
+    client = TestClient(app)
+
+    route_registry.add("image-blur", handler, methods=["POST"])
+
+    openapi_response = client.get("/openapi.json")
+    etag = openapi_response.headers["etag"]
+
+    assert openapi_response.status_code == 200
+    assert client.get("/openapi.json", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/openapi.json", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert app.openapi() is route_registry.schema
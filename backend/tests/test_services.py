@@ -360,3 +360,15 @@ def test_service_heartbeat(client: TestClient, service_instance: HTTPServer):
 
     # Check the output
     assert heartbeat_response.status_code == 200
+
+
+def test_services_batch_heartbeat(client: TestClient, service_instance: HTTPServer):
+    service_copy = service_1.copy()
+    service_copy["url"] = service_instance.url_for("")
+
+    client.post("/services", json=service_copy)
+
+    heartbeat_response = client.post("/services/ping", json={"slugs": [service_copy["slug"], "unknown-service"]})
+
+    assert heartbeat_response.status_code == 200
+    assert heartbeat_response.json() == {"pinged": [service_copy["slug"]], "not_found": ["unknown-service"]}
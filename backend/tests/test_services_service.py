@@ -1,7 +1,15 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from fastapi import FastAPI
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
 from database import get_session
 from common_code.logger.logger import get_logger
 from tasks.service import TasksService
-from services.service import ServicesService
+from services.models import Service
+from services.service import ServicesService, get_services_availability_stats
+from execution_units.enums import ExecutionUnitStatus
 from pipeline_executions.service import PipelineExecutionsService
 from storage.service import StorageService
 from config import get_settings
@@ -42,3 +50,88 @@ def test_services_service():
     )
 
     print(services_service)
+
+
+@pytest.mark.asyncio
+async def test_check_services_availability():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    settings = get_settings()
+    app = FastAPI()
+
+    with Session(engine) as session:
+        services = {}
+        for slug, status, latest_ping in [
+            ("recent", ExecutionUnitStatus.SLEEPING, datetime.now(timezone.utc)),
+            ("old", ExecutionUnitStatus.AVAILABLE, datetime.now(timezone.utc) - timedelta(hours=1)),
+            ("never", ExecutionUnitStatus.AVAILABLE, None),
+            ("disabled", ExecutionUnitStatus.DISABLED, None),
+        ]:
+            services[slug] = Service(
+                name=slug, slug=slug, summary="s", description="d", url=f"http://{slug}", status=status,
+                latest_ping=latest_ping, data_in_fields=[{"name": "image", "type": ["image/jpeg"]}],
+                data_out_fields=[{"name": "image", "type": ["image/jpeg"]}],
+            )
+            session.add(services[slug])
+        session.commit()
+
+        services_service = ServicesService(
+            logger=get_logger(settings),
+            storage_service=SimpleNamespace(),
+            tasks_service=SimpleNamespace(),
+            settings=settings,
+            session=session,
+            http_client=SimpleNamespace(),
+        )
+
+        await services_service.check_services_availability(app)
+
+        for service in services.values():
+            session.refresh(service)
+
+        assert services["recent"].status == ExecutionUnitStatus.AVAILABLE
+        assert services["old"].status == ExecutionUnitStatus.SLEEPING
+        assert services["never"].status == ExecutionUnitStatus.SLEEPING
+        assert services["disabled"].status == ExecutionUnitStatus.DISABLED
+        assert "/recent" in {route.path for route in app.routes}
+
+        stats = get_services_availability_stats()
+        assert stats.services_checked == 3
+        assert stats.status_changes == 3
+        assert stats.timeouts == 0
+
+
+def test_services_heartbeats_are_buffered():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    settings = get_settings()
+
+    with Session(engine) as session:
+        service = Service(
+            name="buffered", slug="buffered", summary="s", description="d", url="http://buffered",
+            data_in_fields=[{"name": "image", "type": ["image/jpeg"]}],
+            data_out_fields=[{"name": "image", "type": ["image/jpeg"]}],
+        )
+        session.add(service)
+        session.commit()
+
+        services_service = ServicesService(
+            logger=get_logger(settings),
+            storage_service=SimpleNamespace(),
+            tasks_service=SimpleNamespace(),
+            settings=settings,
+            session=session,
+            http_client=SimpleNamespace(),
+        )
+
+        assert services_service.ping(["buffered", "unknown"]) == ["buffered"]
+        assert services_service.ping(["buffered"]) == ["buffered"]
+
+        session.refresh(service)
+        assert service.latest_ping is None
+
+        assert services_service.heartbeat_buffer.flush(session) == 1
+
+        session.refresh(service)
+        assert service.latest_ping is not None
+        assert services_service.heartbeat_buffer.flush(session) == 0
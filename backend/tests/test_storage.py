@@ -168,7 +168,7 @@ def test_storage_cannot_download(misconfigured_client: TestClient):
     detail = json["detail"]
 
     assert response.status_code == 500
-    assert detail == "File Cannot Be Checked"
+    assert detail == "File Cannot Be Downloaded"
 
 
 def test_storage_can_delete(client: TestClient):
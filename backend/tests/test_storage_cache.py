@@ -0,0 +1,70 @@
+from storage.cache import FileCache
+
+
+def test_file_cache_get_and_put():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+
+    assert file_cache.get("file.txt") is None
+
+    file_cache.put("file.txt", "content", 7)
+
+    assert file_cache.get("file.txt") == "content"
+    assert file_cache.size == 7
+    assert file_cache.stats() == {"entries": 1, "size": 7, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_file_cache_get_cached_none():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+    missing = object()
+
+    file_cache.put("file.json", None, 4)
+
+    assert file_cache.get("file.json", missing) is None
+    assert file_cache.get("other.json", missing) is missing
+
+
+def test_file_cache_evicts_least_recently_used():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+
+    file_cache.put("first.txt", "first", 40)
+    file_cache.put("second.txt", "second", 40)
+
+    # Use the first file so that the second one is the least recently used
+    file_cache.get("first.txt")
+
+    file_cache.put("third.txt", "third", 40)
+
+    assert file_cache.get("first.txt") == "first"
+    assert file_cache.get("second.txt") is None
+    assert file_cache.get("third.txt") == "third"
+    assert file_cache.size == 80
+    assert file_cache.evictions == 1
+
+
+def test_file_cache_ignores_large_files():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+
+    file_cache.put("large.txt", "large", 60)
+
+    assert file_cache.get("large.txt") is None
+    assert file_cache.size == 0
+
+
+def test_file_cache_put_existing_file():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+
+    file_cache.put("file.txt", "content", 10)
+    file_cache.put("file.txt", "content", 10)
+
+    assert file_cache.size == 10
+
+
+def test_file_cache_remove():
+    file_cache = FileCache(max_size=100, max_file_size=50)
+
+    file_cache.put("file.txt", "content", 10)
+    file_cache.remove("file.txt")
+    file_cache.remove("file.txt")
+
+    assert file_cache.get("file.txt") is None
+    assert file_cache.size == 0
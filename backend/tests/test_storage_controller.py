@@ -4,6 +4,7 @@ import os
 import pytest
 from common_code.logger.logger import get_logger, Logger
 from fastapi import UploadFile, HTTPException
+from starlette.datastructures import Headers
 from testcontainers.minio import MinioContainer
 
 from storage.service import StorageService
@@ -110,6 +111,121 @@ async def test_storage_controller_can_download(storage_service: StorageService,
     assert await file.read() == b"".join(chunks)
 
 
+@pytest.mark.asyncio
+async def test_storage_controller_download_headers(storage_service: StorageService, logger: Logger):
+    response = await storage_controller.upload(
+        file=UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+            headers=Headers({"content-type": "text/plain"}),
+        ),
+        storage_service=storage_service,
+    )
+
+    response = await storage_controller.download(
+        key=response.key,
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(b"".join(chunks)))
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+    assert response.headers["last-modified"]
+
+
+@pytest.mark.asyncio
+async def test_storage_controller_download_range(storage_service: StorageService, logger: Logger):
+    response = await storage_controller.upload(
+        file=UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        ),
+        storage_service=storage_service,
+    )
+
+    response = await storage_controller.download(
+        key=response.key,
+        range_header="bytes=5-6",
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 5-6/14"
+    assert b"".join(chunks) == b"is"
+
+
+@pytest.mark.asyncio
+async def test_storage_controller_download_range_not_satisfiable(storage_service: StorageService, logger: Logger):
+    response = await storage_controller.upload(
+        file=UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        ),
+        storage_service=storage_service,
+    )
+
+    with pytest.raises(HTTPException) as exception_info:
+        await storage_controller.download(
+            key=response.key,
+            range_header="bytes=100-200",
+            storage_service=storage_service,
+            logger=logger,
+        )
+
+    assert exception_info.value.status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_storage_controller_download_not_modified(storage_service: StorageService, logger: Logger):
+    response = await storage_controller.upload(
+        file=UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        ),
+        storage_service=storage_service,
+    )
+
+    key = response.key
+
+    response = await storage_controller.download(
+        key=key,
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    [chunk async for chunk in response.body_iterator]
+
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    response = await storage_controller.download(
+        key=key,
+        if_none_match=etag,
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = await storage_controller.download(
+        key=key,
+        if_modified_since=last_modified,
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    assert response.status_code == 304
+
+
 @pytest.mark.asyncio
 async def test_storage_controller_download_file_not_found(storage_service: StorageService, logger: Logger):
     with pytest.raises(HTTPException) as exception_info:
@@ -137,7 +253,45 @@ async def test_storage_controller_cannot_download(storage_service_wrong_bucket:
     exception = exception_info.value
 
     assert exception.status_code == 500
-    assert exception.detail == "File Cannot Be Checked"
+    assert exception.detail == "File Cannot Be Downloaded"
+
+
+@pytest.mark.asyncio
+async def test_storage_controller_can_get_url(storage_service: StorageService, logger: Logger):
+    response = await storage_controller.upload(
+        file=UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        ),
+        storage_service=storage_service,
+    )
+
+    key = response.key
+
+    response = await storage_controller.get_url(
+        key=key,
+        storage_service=storage_service,
+        logger=logger,
+    )
+
+    assert response.key == key
+    assert key in response.url
+    assert response.expires_in == storage_service.s3_presigned_url_expiration
+
+
+@pytest.mark.asyncio
+async def test_storage_controller_get_url_file_not_found(storage_service: StorageService, logger: Logger):
+    with pytest.raises(HTTPException) as exception_info:
+        await storage_controller.get_url(
+            key="file-not-found",
+            storage_service=storage_service,
+            logger=logger,
+        )
+
+    exception = exception_info.value
+
+    assert exception.status_code == 404
+    assert exception.detail == "File Not Found"
 
 
 @pytest.mark.asyncio
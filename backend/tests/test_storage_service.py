@@ -1,7 +1,10 @@
 import copy
+import httpx
 import io
 import os
 import pytest
+import tempfile
+import tracemalloc
 from botocore.exceptions import ClientError
 from common_code.logger.logger import get_logger, Logger
 from fastapi import UploadFile
@@ -178,3 +181,119 @@ async def test_storage_service_delete_nonexistent_file(storage_service: StorageS
 async def test_storage_service_delete_bucket_not_found(storage_service_wrong_bucket: StorageService):
     with pytest.raises(ClientError, match="The specified bucket does not exist"):
         await storage_service_wrong_bucket.delete("file-not-found")
+
+
+@pytest.mark.asyncio
+async def test_storage_service_shared_client(storage_service: StorageService):
+    await storage_service.open_client()
+
+    try:
+        async with storage_service.client() as first_client, storage_service.client() as second_client:
+            assert first_client is second_client
+
+        key = await storage_service.upload(
+            UploadFile(
+                filename="test.txt",
+                file=io.BytesIO(b"this is a test"),
+            )
+        )
+
+        assert await storage_service.get_file_as_bytes(key) == b"this is a test"
+
+        await storage_service.delete(key)
+    finally:
+        await storage_service.close_client()
+
+    async with storage_service.client() as first_client, storage_service.client() as second_client:
+        assert first_client is not second_client
+
+
+@pytest.mark.asyncio
+async def test_storage_service_multipart_upload_memory_is_bounded(storage_service: StorageService):
+    part_size = 5 * 1024 * 1024
+    file_size = 100 * 1024 * 1024
+
+    storage_service.s3_multipart_part_size = part_size
+    storage_service.s3_multipart_concurrency = 2
+
+    # Write the synthetic file to disk so that only the upload itself is profiled
+    with tempfile.TemporaryFile() as large_file:
+        chunk = b"\0" * (1024 * 1024)
+        for _ in range(file_size // len(chunk)):
+            large_file.write(chunk)
+        large_file.seek(0)
+
+        tracemalloc.start()
+        try:
+            key = await storage_service.upload(UploadFile(filename="large.bin", file=large_file))
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    uploaded_size = 0
+    async for chunk in storage_service.get_file_as_chunks(key):
+        uploaded_size += len(chunk)
+
+    assert uploaded_size == file_size
+    # The parts in flight plus the part being read, with headroom for the client buffers
+    assert peak_memory < part_size * (storage_service.s3_multipart_concurrency + 1) * 3
+
+    await storage_service.delete(key)
+
+
+@pytest.mark.asyncio
+async def test_storage_service_get_presigned_url(storage_service: StorageService):
+    key = await storage_service.upload(
+        UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        )
+    )
+
+    download_url = await storage_service.get_presigned_url(key)
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(download_url)
+
+    assert response.status_code == 200
+    assert response.content == b"this is a test"
+
+
+@pytest.mark.asyncio
+async def test_storage_service_get_presigned_upload_url(storage_service: StorageService):
+    key = "presigned-upload.txt"
+
+    upload_url = await storage_service.get_presigned_url(key, upload=True)
+
+    async with httpx.AsyncClient() as client:
+        response = await client.put(upload_url, content=b"this is a test")
+
+    assert response.status_code == 200
+    assert await storage_service.get_file_as_bytes(key) == b"this is a test"
+
+
+@pytest.mark.asyncio
+async def test_storage_service_get_decoded_file(storage_service: StorageService):
+    text_key = await storage_service.upload(
+        UploadFile(
+            filename="test.txt",
+            file=io.BytesIO(b"this is a test"),
+        )
+    )
+    json_key = await storage_service.upload(
+        UploadFile(
+            filename="test.json",
+            file=io.BytesIO(b'{"areas": [[1, 2, 3, 4]]}'),
+        )
+    )
+
+    hits = storage_service.file_cache.hits
+
+    assert await storage_service.get_decoded_file(text_key) == "this is a test"
+    assert await storage_service.get_decoded_file(json_key) == {"areas": [[1, 2, 3, 4]]}
+    assert storage_service.file_cache.hits == hits
+
+    # The second reads are served from the cache
+    assert await storage_service.get_decoded_file(text_key) == "this is a test"
+    assert await storage_service.get_decoded_file(json_key) == {"areas": [[1, 2, 3, 4]]}
+    assert storage_service.file_cache.hits == hits + 2